@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmarks for the DOJ database backends. The workloads use the
+models of the test application (`doj.tests.db`) and are run against a
+database with the `dojbench` management command, which reports the results
+as JSON, so runs with different drivers or backend versions can be compared.
+"""
+
+from doj.benchmarks.runner import run_benchmark, run_benchmarks
+from doj.benchmarks.workloads import BENCHMARKS
+
+__all__ = (
+    'BENCHMARKS',
+    'run_benchmark',
+    'run_benchmarks',
+)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import math
+import platform
+
+from java.lang import Runtime, System
+
+from django.db import connections
+
+from doj.benchmarks.workloads import BENCHMARKS
+
+
+def _used_heap():
+    """
+    Gets the used heap of the JVM after a garbage collection.
+
+    :return: Used heap in bytes
+    """
+    runtime = Runtime.getRuntime()
+    System.gc()
+    return runtime.totalMemory() - runtime.freeMemory()
+
+
+def _percentile(timings, percent):
+    """
+    Gets a percentile of sorted timings, using the nearest rank.
+
+    :param timings: Sorted list of timings
+    :param percent: Percentile between 0 and 100
+    :return: Timing
+    """
+    rank = int(math.ceil(percent / 100.0 * len(timings)))
+    return timings[max(rank, 1) - 1]
+
+
+def run_benchmark(benchmark, iterations, warmup=0):
+    """
+    Runs a benchmark `iterations` times after `warmup` untimed runs.
+
+    :param benchmark: Benchmark instance
+    :param iterations: Number of timed runs
+    :param warmup: Number of runs before the timed ones, which let the JIT
+                   compiler and the caches of the backends warm up
+    :return: Dictionary of results, with latencies in milliseconds
+    """
+    if iterations < 1:
+        raise ValueError("A benchmark needs at least one iteration, got %r" % (iterations, ))
+
+    benchmark.setup()
+    try:
+        for _ in range(warmup):
+            benchmark.run()
+
+        heap_before = _used_heap()
+        timings = []
+        for _ in range(iterations):
+            start = System.nanoTime()
+            benchmark.run()
+            timings.append(System.nanoTime() - start)
+        heap_after = _used_heap()
+    finally:
+        benchmark.teardown()
+
+    total = sum(timings)
+    timings.sort()
+    ops_per_sec = iterations / (total / 1e9) if total else None
+    return {
+        'name': benchmark.name,
+        'iterations': iterations,
+        'rows_per_op': benchmark.rows_per_op,
+        'ops_per_sec': ops_per_sec,
+        'rows_per_sec': ops_per_sec * benchmark.rows_per_op if ops_per_sec else None,
+        'latency_ms': {
+            'min': timings[0] / 1e6,
+            'p50': _percentile(timings, 50) / 1e6,
+            'p90': _percentile(timings, 90) / 1e6,
+            'p99': _percentile(timings, 99) / 1e6,
+            'max': timings[-1] / 1e6,
+        },
+        'heap_delta_bytes': heap_after - heap_before,
+    }
+
+
+def run_benchmarks(names=None, iterations=100, warmup=10, records=1000, using='default'):
+    """
+    Runs benchmarks against a database. The tables of the test application
+    must exist and are emptied by the benchmarks.
+
+    :param names: Names of the benchmarks to run, all if None
+    :param iterations: Number of timed runs of each benchmark
+    :param warmup: Number of untimed runs before the timed ones
+    :param records: Number of records the workloads operate on
+    :param using: Alias of the database
+    :return: Dictionary describing the environment and the results
+    """
+    connection = connections[using]
+    results = []
+    for name in names or sorted(BENCHMARKS):
+        benchmark = BENCHMARKS[name](records=records, using=using)
+        results.append(run_benchmark(benchmark, iterations, warmup))
+
+    return {
+        'vendor': connection.vendor,
+        'engine': connection.settings_dict['ENGINE'],
+        'python': platform.python_version(),
+        'java': System.getProperty('java.version'),
+        'max_heap_bytes': Runtime.getRuntime().maxMemory(),
+        'iterations': iterations,
+        'warmup': warmup,
+        'records': records,
+        'results': results,
+    }
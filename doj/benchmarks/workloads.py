@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+from django.db import connections
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.utils import timezone
+
+from doj.tests.db.models import TestModel, TestModelRelation
+
+
+class Benchmark(object):
+    """
+    A workload run repeatedly by `run_benchmark`. The tables of the test
+    models are emptied before and after the benchmark.
+    """
+    name = None
+    # Number of rows read or written by one run
+    rows_per_op = 1
+
+    def __init__(self, records=1000, using='default'):
+        self.records = records
+        self.using = using
+
+    def setup(self):
+        self._clear()
+
+    def run(self):
+        raise NotImplementedError
+
+    def teardown(self):
+        self._clear()
+
+    def _clear(self):
+        TestModel.objects.using(self.using).all().delete()
+        TestModelRelation.objects.using(self.using).all().delete()
+
+    def _create_records(self, relations=None):
+        """
+        Creates `records` test models, referencing the given relations in turn.
+        """
+        TestModel.objects.using(self.using).bulk_create(
+            [TestModel(field_19=relations[i % len(relations)] if relations else None)
+             for i in range(self.records)]
+        )
+
+
+class InsertBenchmark(Benchmark):
+    """
+    Saves a single new object.
+    """
+    name = 'insert'
+
+    def run(self):
+        TestModel().save(using=self.using)
+
+
+class BulkCreateBenchmark(Benchmark):
+    """
+    Creates `records` objects with `bulk_create`.
+    """
+    name = 'bulk_create'
+
+    @property
+    def rows_per_op(self):
+        return self.records
+
+    def run(self):
+        self._create_records()
+
+
+class SlicedReadBenchmark(Benchmark):
+    """
+    Reads pages of 10 objects at increasing offsets.
+    """
+    name = 'sliced_read'
+    rows_per_op = 10
+
+    def setup(self):
+        super(SlicedReadBenchmark, self).setup()
+        self._create_records()
+        self._offset = 0
+
+    def run(self):
+        queryset = TestModel.objects.using(self.using).order_by('pk')
+        list(queryset[self._offset:self._offset + self.rows_per_op])
+        self._offset = (self._offset + self.rows_per_op) % max(self.records - self.rows_per_op, 1)
+
+
+class SelectRelatedBenchmark(Benchmark):
+    """
+    Reads 100 objects joined with their relations.
+    """
+    name = 'select_related'
+    rows_per_op = 100
+
+    def setup(self):
+        super(SelectRelatedBenchmark, self).setup()
+        relations = [TestModelRelation(field_1=i) for i in range(10)]
+        for relation in relations:
+            relation.save(using=self.using)
+        self._create_records(relations)
+
+    def run(self):
+        for test_model in TestModel.objects.using(self.using).select_related('field_19')[:self.rows_per_op]:
+            test_model.field_19
+
+
+class AggregateBenchmark(Benchmark):
+    """
+    Aggregates a few columns of all objects.
+    """
+    name = 'aggregate'
+
+    def setup(self):
+        super(AggregateBenchmark, self).setup()
+        self._create_records()
+
+    def run(self):
+        TestModel.objects.using(self.using).aggregate(
+            Count('id'), Sum('field_10'), Avg('field_9'), Min('field_7'), Max('field_13'),
+        )
+
+
+class DateLookupBenchmark(Benchmark):
+    """
+    Counts objects with date part lookups on a datetime field.
+    """
+    name = 'date_lookup'
+
+    def setup(self):
+        super(DateLookupBenchmark, self).setup()
+        self._create_records()
+        self._now = timezone.now()
+
+    def run(self):
+        TestModel.objects.using(self.using).filter(
+            field_6__year=self._now.year,
+            field_6__month=self._now.month,
+        ).count()
+
+
+class IteratorBenchmark(Benchmark):
+    """
+    Iterates over all objects, streaming them from the database.
+    """
+    name = 'iterator'
+
+    @property
+    def rows_per_op(self):
+        return self.records
+
+    def setup(self):
+        super(IteratorBenchmark, self).setup()
+        self._create_records()
+
+    def run(self):
+        with connections[self.using].streaming():
+            for _ in TestModel.objects.using(self.using).iterator():
+                pass
+
+
+BENCHMARKS = dict((benchmark.name, benchmark) for benchmark in (
+    InsertBenchmark,
+    BulkCreateBenchmark,
+    SlicedReadBenchmark,
+    SelectRelatedBenchmark,
+    AggregateBenchmark,
+    DateLookupBenchmark,
+    IteratorBenchmark,
+))
@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 
-from java.sql import Connection
+from java.lang import AbstractMethodError, System
+from java.sql import Connection, SQLException, Statement
 from com.ziclix.python.sql import zxJDBC
 
+import time
+
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 
 from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.utils import IntegrityError
 from django.db.backends.base.features import BaseDatabaseFeatures
 from django.db.backends.base.operations import BaseDatabaseOperations
 from django.db.backends.base.introspection import BaseDatabaseIntrospection, FieldInfo, TableInfo
@@ -14,6 +20,12 @@ from django.db.backends.base.validation import BaseDatabaseValidation
 from django.db.backends.base.creation import BaseDatabaseCreation
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
 
+from doj.db.backends import instrumentation
+from doj.db.backends.capabilities import get_capabilities
+from doj.db.backends.jmx import get_metrics
+from doj.db.backends.pool import close_pools, get_pool
+from doj.db.backends.utils import LRUCache
+
 __all__ = (
     'JDBCBaseDatabaseWrapper',
     'JDBCBaseDatabaseFeatures',
@@ -40,6 +52,30 @@ class JDBCBaseDatabaseWrapper(BaseDatabaseWrapper):
     jdbc_driver_class_name = None
     jdbc_connection_url_pattern = None
 
+    # Entries of the OPTIONS dictionary that configure DOJ itself and
+    # therefore are not passed to the JDBC driver as connection properties.
+    doj_options = (
+        'JNDI_NAME',
+        'JNDI_CONTEXT_OPTIONS',
+        'SQL_CACHE_SIZE',
+        'STATEMENT_CACHE_SIZE',
+        'POOL',
+        'FETCH_SIZE',
+        'BATCH_SIZE',
+        'JMX',
+    )
+    default_sql_cache_size = 512
+    default_statement_cache_size = 0
+    default_fetch_size = 1000
+    # Seconds to wait for the driver to validate a connection
+    validation_timeout = 5
+    # Whether the driver only honors the fetch size of a statement inside of
+    # a transaction.
+    streaming_requires_transaction = False
+    # Connection properties which let the driver rewrite JDBC batches into
+    # more efficient statements, set if BATCH_SIZE is used.
+    jdbc_batch_connection_properties = {}
+
     Database = zxJDBC
     Error = Database.Error
     NotSupportedError = Database.NotSupportedError
@@ -50,6 +86,56 @@ class JDBCBaseDatabaseWrapper(BaseDatabaseWrapper):
     def __init__(self, *args, **kwargs):
         super(JDBCBaseDatabaseWrapper, self).__init__(*args, **kwargs)
 
+        # Caches the "%s" -> "?" rewritten statements, keyed on the
+        # original SQL and the number of parameters.
+        self.sql_cache = LRUCache(self.get_option('SQL_CACHE_SIZE', self.default_sql_cache_size))
+        # Caches zxJDBC prepared statements of the current connection, keyed
+        # on the rewritten SQL.
+        self.statement_cache = LRUCache(self.get_option('STATEMENT_CACHE_SIZE', self.default_statement_cache_size),
+                                        on_evict=_close_statement)
+        # The pool the current connection has been borrowed from, if any
+        self.pool = None
+        # If set, queries are streamed from the database in chunks of
+        # `fetch_size` rows instead of being read completely on execute.
+        self.fetch_size = self.get_option('FETCH_SIZE')
+        # If set, executemany sends the parameters in JDBC batches of
+        # `batch_size` rows.
+        self.batch_size = self.get_option('BATCH_SIZE')
+        # The cursor which started a transaction to stream its query, if any
+        self._streaming_cursor = None
+        # The metrics published through JMX, if enabled
+        self.metrics = None
+        if self.get_option('JMX'):
+            self.metrics = get_metrics(self.alias)
+            self.metrics.add_wrapper(self)
+            self.sql_cache.on_lookup = self.metrics.sql_cache_lookup
+            self.statement_cache.on_lookup = self.metrics.statement_cache_lookup
+
+    def get_option(self, name, default=None):
+        """
+        Gets an entry of the OPTIONS dictionary of the database settings.
+
+        :param name: Name of the option
+        :param default: Value returned if the option isn't set
+        :return: Option value
+        """
+        return (self.settings_dict.get('OPTIONS') or {}).get(name, default)
+
+    def get_jdbc_connection_properties(self, conn_params):
+        """
+        Gets the connection properties handed to the JDBC driver, which are
+        all OPTIONS entries except the ones used by DOJ itself.
+
+        :param conn_params: Connection parameters
+        :return: Dictionary of connection properties
+        """
+        properties = {}
+        if self.batch_size:
+            properties.update(self.jdbc_batch_connection_properties)
+        properties.update((key, value) for key, value in conn_params.get('OPTIONS', {}).items()
+                          if key not in self.doj_options)
+        return properties
+
     def get_jdbc_settings(self):
         settings_dict = dict(self.settings_dict)  # copy instead of reference
 
@@ -100,20 +186,235 @@ class JDBCBaseDatabaseWrapper(BaseDatabaseWrapper):
         settings_dict['NAME'] = settings_dict['NAME'] or self.jdbc_default_name
         return settings_dict
 
+    def get_new_jdbc_connection(self, conn_params):
+        """
+        Opens a new zxJDBC connection using the JDBC driver.
+
+        :param conn_params: Connection parameters
+        :return: zxJDBC Connection
+        """
+        connection = zxJDBC.connect(self.get_jdbc_connection_url(),
+                                    conn_params['USER'],
+                                    conn_params['PASSWORD'],
+                                    self.jdbc_driver_class_name,
+                                    **self.get_jdbc_connection_properties(conn_params))
+        self._set_default_isolation_level(connection)
+        return connection
+
+    def get_connection_pool(self, conn_params):
+        """
+        Gets the connection pool for this database if the POOL entry is set
+        on the OPTIONS dictionary, or None if it isn't.
+
+        :param conn_params: Connection parameters
+        :return: ConnectionPool
+        """
+        options = self.get_option('POOL')
+        if not options:
+            return None
+
+        if options is True:
+            options = {}
+        # Only connections opened with the same credentials and driver
+        # properties are interchangeable.
+        properties = tuple(sorted(self.get_jdbc_connection_properties(conn_params).items()))
+        key = (self.get_jdbc_connection_url(), conn_params['USER'], conn_params['PASSWORD'], properties)
+        return get_pool(key, lambda: self.get_new_jdbc_connection(conn_params), options)
+
+    def close_connection_pools(self):
+        """
+        Closes the pools of connections to the database of this wrapper,
+        whatever their credentials and options, e.g. before the database is
+        dropped.
+        """
+        url = self.get_jdbc_connection_url()
+        close_pools(lambda key: key[0] == url)
+
     def get_new_connection(self, conn_params):
+        start = time.time()
         connection = self.get_new_jndi_connection()
 
         if not connection:
-            connection = zxJDBC.connect(self.get_jdbc_connection_url(),
-                                        conn_params['USER'],
-                                        conn_params['PASSWORD'],
-                                        self.jdbc_driver_class_name,
-                                        **conn_params['OPTIONS'])
-            self._set_default_isolation_level(connection)
+            pool = self.get_connection_pool(conn_params)
+            if pool is not None:
+                connection = pool.acquire(self.is_connection_usable)
+                self.pool = pool
+            else:
+                connection = self.get_new_jdbc_connection(conn_params)
+
+        if self.metrics is not None:
+            self.metrics.connection_opened(time.time() - start, self.pool)
         return connection
 
     def create_cursor(self):
-        return JDBCCursorWrapper(self.connection.cursor())
+        return JDBCCursorWrapper(self.new_jdbc_cursor(), self)
+
+    def new_jdbc_cursor(self):
+        """
+        Creates a zxJDBC cursor on the current connection. If results are
+        streamed, the cursor is dynamic, so rows are only read from the JDBC
+        result set as they are fetched.
+
+        :return: zxJDBC cursor
+        """
+        if self.fetch_size is not None:
+            return self.connection.cursor(1)
+        return self.connection.cursor()
+
+    @contextmanager
+    def streaming(self, fetch_size=None):
+        """
+        Streams the results of the queries executed by cursors created within
+        the block, e.g. to iterate over large querysets with constant memory::
+
+            with connection.streaming(fetch_size=500):
+                for obj in MyModel.objects.iterator():
+                    ...
+
+        :param fetch_size: Number of rows fetched from the database at once
+        """
+        previous_fetch_size = self.fetch_size
+        self.fetch_size = fetch_size or previous_fetch_size or self.default_fetch_size
+        try:
+            yield
+        finally:
+            self.fetch_size = previous_fetch_size
+
+    def end_streaming(self):
+        """
+        Commits the transaction a cursor started to stream a query (see
+        `streaming_requires_transaction`) and restores autocommit. The rest
+        of its result is read into memory first, so it can still be fetched.
+        Called before any other statement is executed on the connection and
+        whenever the transaction state is read or changed, so the transaction
+        never outlives the use of the cursor and other statements never run
+        in it.
+        """
+        if self._streaming_cursor is not None:
+            self._streaming_cursor._end_streaming(read_results=True)
+
+    def get_autocommit(self):
+        self.end_streaming()
+        return super(JDBCBaseDatabaseWrapper, self).get_autocommit()
+
+    def set_autocommit(self, autocommit):
+        self.end_streaming()
+        return super(JDBCBaseDatabaseWrapper, self).set_autocommit(autocommit)
+
+    def set_statement_fetch_size(self, statement, fetch_size):
+        """
+        Applies the fetch size to a statement executing a streamed query.
+        Backends can override this if their driver needs a special value.
+
+        :param statement: java.sql.Statement
+        :param fetch_size: Number of rows fetched from the database at once
+        """
+        statement.setFetchSize(fetch_size)
+
+    def get_server_capabilities(self):
+        """
+        Gets the capabilities of the database server, like its version. They
+        are probed once per process and JDBC URL, and shared by all
+        connections to the same server.
+
+        :return: Dictionary of capabilities
+        """
+        return get_capabilities(self.get_jdbc_connection_url(), self.probe_server_capabilities)
+
+    def probe_server_capabilities(self):
+        """
+        Queries the capabilities of the database server. Backends override
+        this to determine everything their features depend on in one go.
+
+        :return: Dictionary of capabilities
+        """
+        return {}
+
+    def check_constraints(self, table_names=None):
+        """
+        Checks each table name in `table_names` for rows with invalid foreign key references. This method is
+        intended to be used in conjunction with `disable_constraint_checking()` and `enable_constraint_checking()`, to
+        determine if rows with invalid references were entered while constraint checks were off.
+
+        Raises an IntegrityError on the first invalid foreign key reference encountered (if any) and provides
+        detailed information about the invalid reference in the error message.
+
+        The key columns of all tables are introspected at once, and every foreign key is probed for a single
+        invalid row only. Backends can override this method if they can more directly apply constraint checking
+        (e.g. via "SET CONSTRAINTS ALL IMMEDIATE")
+        """
+        qn = self.ops.quote_name
+        with self.cursor() as cursor:
+            if table_names is None:
+                table_names = self.introspection.table_names(cursor)
+            key_columns_by_table = self.introspection.get_key_columns_by_table(cursor, table_names)
+            for table_name in table_names:
+                primary_key_column_name, key_columns = key_columns_by_table[table_name]
+                if not primary_key_column_name:
+                    continue
+                for column_name, referenced_table_name, referenced_column_name in key_columns:
+                    cursor.execute("""
+                        SELECT REFERRING.%s, REFERRING.%s FROM %s as REFERRING
+                        LEFT JOIN %s as REFERRED
+                        ON (REFERRING.%s = REFERRED.%s)
+                        WHERE REFERRING.%s IS NOT NULL AND REFERRED.%s IS NULL
+                        LIMIT 1"""
+                        % (qn(primary_key_column_name), qn(column_name), qn(table_name), qn(referenced_table_name),
+                        qn(column_name), qn(referenced_column_name), qn(column_name), qn(referenced_column_name)))
+                    bad_row = cursor.fetchone()
+                    if bad_row is not None:
+                        raise IntegrityError("The row in table '%s' with primary key '%s' has an invalid "
+                            "foreign key: %s.%s contains a value '%s' that does not have a corresponding value in %s.%s."
+                            % (table_name, bad_row[0], table_name, column_name, bad_row[1],
+                            referenced_table_name, referenced_column_name))
+
+    def is_usable(self):
+        return self.is_connection_usable(self.connection)
+
+    def is_connection_usable(self, connection):
+        """
+        Checks if the given connection to the database is still usable, using
+        `java.sql.Connection.isValid`. Drivers which don't implement it
+        execute "SELECT 1" instead.
+
+        :param connection: zxJDBC connection
+        :return: True if the connection is usable
+        """
+        try:
+            return connection.__connection__.isValid(self.validation_timeout)
+        except AbstractMethodError:
+            pass
+        except SQLException:
+            return False
+
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except self.Error:
+            return False
+        else:
+            return True
+
+    def _close(self):
+        # The cached statements and the streaming transaction belong to the
+        # connection which is closed now
+        self.statement_cache.clear()
+        self._streaming_cursor = None
+
+        if self.pool is not None and self.connection is not None:
+            pool, self.pool = self.pool, None
+            if self.in_atomic_block:
+                # Django keeps using the closed connection object until the
+                # atomic block is left, so it must not be handed out again.
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection)
+            return
+
+        return super(JDBCBaseDatabaseWrapper, self)._close()
 
     def _set_autocommit(self, autocommit):
         self.connection.autocommit = autocommit
@@ -130,6 +431,46 @@ class JDBCBaseDatabaseWrapper(BaseDatabaseWrapper):
         jdbc_connection.setTransactionIsolation(JDBCConnection.TRANSACTION_READ_COMMITTED)
 
 
+def _close_statement(sql, statement):
+    """
+    Closes a zxJDBC prepared statement evicted from a statement cache.
+    """
+    try:
+        statement.close()
+    except zxJDBC.Error:
+        pass
+
+
+def _sum_update_counts(rowcount, update_counts):
+    """
+    Adds the update counts returned by `executeBatch` to `rowcount`. If the
+    driver doesn't report the number of affected rows, the result is -1.
+    """
+    for count in update_counts:
+        if rowcount < 0 or count == Statement.SUCCESS_NO_INFO:
+            return -1
+        rowcount += count
+    return rowcount
+
+
+def _jdbc_error(e):
+    """
+    Converts a java.sql.SQLException raised outside of zxJDBC, e.g. by a
+    JDBC batch, to the matching zxJDBC exception, based on its SQL state.
+    """
+    sql_state = e.getSQLState() or ''
+    if sql_state.startswith('23'):
+        return zxJDBC.IntegrityError(e.getMessage())
+    return zxJDBC.DatabaseError(e.getMessage())
+
+
+def _is_query(sql):
+    """
+    Checks if `sql` is a query returning rows, which can be streamed.
+    """
+    return sql.lstrip()[:6].upper() == 'SELECT'
+
+
 class JDBCBaseDatabaseOperations(BaseDatabaseOperations):
     """
     zxJDBC supports dates, times, datetimes and decimal directly, so we
@@ -157,9 +498,25 @@ class JDBCCursorWrapper(object):
     """
     A simple wrapper to do the "%s" -> "?" replacement before running zxJDBC's
     execute or executemany.
+
+    If the wrapper knows the database wrapper it belongs to, the rewritten
+    statements are taken from its `sql_cache`, and parametrized statements
+    are executed as prepared statements taken from its `statement_cache`.
+
+    While listeners are registered in `instrumentation`, the execute and
+    fetch times of the statements are measured and reported to them.
     """
-    def __init__(self, cursor):
+    def __init__(self, cursor, db=None):
         self.cursor = cursor
+        self.db = db
+        self.fetch_size = db.fetch_size if db is not None else None
+        self._statement = None
+        self._batch_rowcount = None
+        # Rows read into memory when the streaming transaction was committed
+        self._buffer = None
+        # [sql, many, execute ns, fetch ns, fetched rows, rowcount] of the
+        # last statement, while it is instrumented
+        self._event = None
 
     def __get_arraysize(self):
         return self.cursor.arraysize
@@ -168,6 +525,8 @@ class JDBCCursorWrapper(object):
         self.cursor.arraysize = size
 
     def __get_rowcount(self):
+        if self._batch_rowcount is not None:
+            return self._batch_rowcount
         if self.cursor.updatecount > self.cursor.rowcount:
             return self.cursor.updatecount
         return self.cursor.rowcount
@@ -178,42 +537,322 @@ class JDBCCursorWrapper(object):
     def __iter__(self):
         return iter(self.next, None)
 
+    def _to_jdbc_sql(self, sql, num_params):
+        """
+        Replaces the "%s" placeholders of `sql` with "?".
+
+        :param sql: SQL using "%s" placeholders
+        :param num_params: Number of parameters
+        :return: SQL using "?" placeholders
+        """
+        if self.db is None:
+            return sql % (('?',) * num_params)
+
+        key = (sql, num_params)
+        jdbc_sql = self.db.sql_cache.get(key)
+        if jdbc_sql is None:
+            jdbc_sql = sql % (('?',) * num_params)
+            self.db.sql_cache.put(key, jdbc_sql)
+        return jdbc_sql
+
+    def _prepare(self, sql, fetch_size=None, force=False):
+        """
+        Gets a prepared statement for `sql` from the statement cache. The
+        statement is checked out of the cache as long as this cursor uses it,
+        so a statement is never shared by two open result sets.
+
+        :param sql: SQL using "?" placeholders
+        :param fetch_size: Fetch size for streamed queries
+        :param force: Prepare the statement even if the cache is disabled
+        :return: zxJDBC prepared statement, or `sql` if neither the cache is
+                 enabled nor the statement must be prepared
+        """
+        self._release_statement()
+
+        cache_enabled = self.db is not None and self.db.statement_cache.maxsize
+        if not cache_enabled and fetch_size is None and not force:
+            return sql
+
+        statement = self.db.statement_cache.take(sql) if cache_enabled else None
+        if statement is None:
+            statement = self.cursor.prepare(sql)
+        if fetch_size is not None:
+            self.db.set_statement_fetch_size(statement.__statement__, fetch_size)
+        self._statement = (sql, statement, fetch_size is not None)
+        return statement
+
+    def _release_statement(self):
+        """
+        Returns the prepared statement used by this cursor to the cache, or
+        closes it if the cache is disabled. Statements of a connection which
+        has been closed or returned to a pool in the meantime are closed as
+        well, since the cache belongs to the current connection.
+        """
+        if self._statement is None:
+            return
+
+        sql, statement, streamed = self._statement
+        self._statement = None
+        if statement.closed:
+            return
+
+        if not self._is_current_statement(statement):
+            _close_statement(sql, statement)
+            return
+
+        if streamed:
+            try:
+                statement.__statement__.setFetchSize(0)
+            except SQLException:
+                _close_statement(sql, statement)
+                return
+        self.db.statement_cache.put(sql, statement)
+
+    def _is_current_statement(self, statement):
+        """
+        Checks if a prepared statement belongs to the current connection of
+        the database wrapper.
+
+        :param statement: zxJDBC prepared statement
+        :return: True if the statement can be cached
+        """
+        connection = self.db.connection
+        if connection is None:
+            return False
+        try:
+            return statement.__statement__.getConnection() == connection.__connection__
+        except SQLException:
+            return False
+
+    def _begin_streaming(self):
+        """
+        Starts a transaction for streaming the results of a query, if the
+        driver requires one and the connection is in autocommit mode. It's
+        committed when the cursor is closed or executes another statement,
+        or by `JDBCBaseDatabaseWrapper.end_streaming`.
+        """
+        if self.db.streaming_requires_transaction and self.db.get_autocommit():
+            self.db.set_autocommit(False)
+            self.db._streaming_cursor = self
+
+    def _end_streaming(self, read_results=False):
+        """
+        Commits the streaming transaction started by this cursor, if any.
+
+        :param read_results: Read the rest of the result into memory first
+        """
+        if self.db is None or self.db._streaming_cursor is not self:
+            return
+
+        if read_results:
+            self._buffer = deque(self._fetchall())
+        self.db._streaming_cursor = None
+        try:
+            self.db.commit()
+        finally:
+            self.db.set_autocommit(True)
+
+    def _end_all_streaming(self):
+        """
+        Ends the streaming transaction of the connection before a statement
+        is executed, discarding the result of this cursor.
+        """
+        self._buffer = None
+        if self.db is not None:
+            self._end_streaming()
+            self.db.end_streaming()
+
     def execute(self, sql, params=None):
+        if not instrumentation.listeners:
+            return self._execute(sql, params)
+        self._end_event()
+        start = System.nanoTime()
+        try:
+            self._execute(sql, params)
+        finally:
+            self._begin_event(sql, False, System.nanoTime() - start)
+
+    def executemany(self, sql, param_list):
+        if not instrumentation.listeners:
+            return self._executemany(sql, param_list)
+        self._end_event()
+        start = System.nanoTime()
+        try:
+            self._executemany(sql, param_list)
+        finally:
+            self._begin_event(sql, True, System.nanoTime() - start)
+
+    def _execute(self, sql, params=None):
+        self._end_all_streaming()
+        self._batch_rowcount = None
         if not params:
             params = tuple()
-        sql = sql % (('?',) * len(params))
+        sql = self._to_jdbc_sql(sql, len(params))
+        if self.fetch_size is not None and _is_query(sql):
+            self._begin_streaming()
+            sql = self._prepare(sql, self.fetch_size)
+        elif params:
+            sql = self._prepare(sql)
         self.cursor.execute(sql, params)
 
-    def executemany(self, sql, param_list):
+    def _executemany(self, sql, param_list):
+        self._end_all_streaming()
+        self._batch_rowcount = None
         if len(param_list) > 0:
-            sql = sql % (('?',) * len(param_list[0]))
+            sql = self._to_jdbc_sql(sql, len(param_list[0]))
+            if self.db is not None and self.db.batch_size:
+                return self._execute_batch(sql, param_list, self.db.batch_size)
+            sql = self._prepare(sql)
         self.cursor.executemany(sql, param_list)
 
+    def _begin_event(self, sql, many, execute_time):
+        """
+        Starts recording the event of an executed statement, which is
+        completed by the fetches of its results.
+        """
+        try:
+            rowcount = self.rowcount
+        except Exception:
+            rowcount = -1
+        self._event = [sql, many, execute_time, 0, None, rowcount]
+
+    def _fetched(self, fetch_time, rows):
+        if self._event is not None:
+            self._event[3] += fetch_time
+            self._event[4] = (self._event[4] or 0) + rows
+
+    def _end_event(self):
+        """
+        Reports the event of the last statement to the listeners.
+        """
+        if self._event is None:
+            return
+        sql, many, execute_time, fetch_time, fetched_rows, rowcount = self._event
+        self._event = None
+        instrumentation.notify(instrumentation.StatementEvent(
+            alias=self.db.alias if self.db is not None else None,
+            sql=sql,
+            many=many,
+            execute_time=execute_time / 1e9,
+            fetch_time=fetch_time / 1e9,
+            rows=rowcount if fetched_rows is None else fetched_rows,
+        ))
+
+    def _execute_batch(self, sql, param_list, batch_size):
+        """
+        Executes a statement for each parameter sequence of `param_list` using
+        JDBC batches of up to `batch_size` rows. The update counts of all
+        batches are summed up as `rowcount`.
+
+        :param sql: SQL using "?" placeholders
+        :param param_list: List of parameter sequences
+        :param batch_size: Maximum number of rows per batch
+        """
+        statement = self._prepare(sql, force=True)
+        jdbc_statement = statement.__statement__
+        datahandler = self.cursor.datahandler
+        rowcount = 0
+
+        try:
+            for row, params in enumerate(param_list, 1):
+                for index, value in enumerate(params, 1):
+                    datahandler.setJDBCObject(jdbc_statement, index, value)
+                jdbc_statement.addBatch()
+                if row % batch_size == 0 or row == len(param_list):
+                    rowcount = _sum_update_counts(rowcount, jdbc_statement.executeBatch())
+        except SQLException, e:
+            raise _jdbc_error(e)
+        finally:
+            # Rows added before an error must not be sent with the next batch
+            # of the cached statement
+            try:
+                jdbc_statement.clearBatch()
+            except SQLException:
+                pass
+
+        self._batch_rowcount = rowcount
+
     def callproc(self, procname, parameters=None):
         return self.cursor.callproc(procname, parameters)
 
     def close(self):
-        return self.cursor.close()
+        self._end_event()
+        self._release_statement()
+        try:
+            return self.cursor.close()
+        finally:
+            self._end_streaming()
 
     def fetchone(self):
+        if self._event is None:
+            return self._fetchone()
+        start = System.nanoTime()
+        row = self._fetchone()
+        self._fetched(System.nanoTime() - start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        if self._event is None:
+            return self._fetchmany(size)
+        start = System.nanoTime()
+        rows = self._fetchmany(size)
+        self._fetched(System.nanoTime() - start, len(rows))
+        return rows
+
+    def fetchall(self):
+        if self._event is None:
+            return self._fetchall()
+        start = System.nanoTime()
+        rows = self._fetchall()
+        self._fetched(System.nanoTime() - start, len(rows))
+        return rows
+
+    def next(self):
+        if self._buffer is not None:
+            row = self._fetchone()
+            if row is None:
+                raise StopIteration
+            return row
+        return self.cursor.next()
+
+    def _fetchone(self):
+        if self._buffer is not None:
+            return self._buffer.popleft() if self._buffer else None
         try:
             return self.cursor.fetchone()
         except JDBCBaseDatabaseWrapper.DatabaseError:
             return None
 
-    def fetchmany(self, size=None):
+    def _fetchmany(self, size=None):
         if not size:
             size = self.cursor.arraysize
 
+        if self._buffer is not None:
+            return [self._buffer.popleft() for _ in range(min(size, len(self._buffer)))]
+
         # `fetchmany` may rise an IndexError if the result set is
         # smaller than the size parameter. We fallback to `fetchall`
         # in that case.
         try:
             return self.cursor.fetchmany(size)
         except (IndexError, JDBCBaseDatabaseWrapper.DatabaseError):
-            return self.cursor.fetchall()
-
-    def fetchall(self):
+            if self.fetch_size is None:
+                return self.cursor.fetchall()
+
+        # A streamed result set must not be read completely, so we collect
+        # the remaining rows one by one.
+        rows = []
+        while len(rows) < size:
+            row = self._fetchone()
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def _fetchall(self):
+        if self._buffer is not None:
+            rows, self._buffer = list(self._buffer), deque()
+            return rows
         try:
             return self.cursor.fetchall()
         except (IndexError, JDBCBaseDatabaseWrapper.DatabaseError):
@@ -268,6 +907,17 @@ class JDBCBaseDatabaseIntrospection(BaseDatabaseIntrospection):
         zxJDBC.VARCHAR: 'CharField',
     }
 
+    def get_key_columns_by_table(self, cursor, table_names):
+        """
+        Returns a dictionary of {table_name: (primary_key_column, key_columns)}
+        for the given tables, where key_columns is a list as returned by
+        `get_key_columns`. Backends should override this to read the data of
+        all tables at once.
+        """
+        return dict((table_name, (self.get_primary_key_column(cursor, table_name),
+                                  self.get_key_columns(cursor, table_name)))
+                    for table_name in table_names)
+
 
 class JDBCBaseDatabaseClient(BaseDatabaseClient):
     pass
@@ -278,7 +928,10 @@ class JDBCBaseDatabaseValidation(BaseDatabaseValidation):
 
 
 class JDBCBaseDatabaseCreation(BaseDatabaseCreation):
-    pass
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database open
+        self.connection.close_connection_pools()
+        super(JDBCBaseDatabaseCreation, self)._destroy_test_db(test_database_name, verbosity)
 
 
 class JDBCFieldInfo(FieldInfo):
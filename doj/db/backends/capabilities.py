@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+A process-wide cache for the capabilities of database servers, like their
+version. The backends probe a server once and share the result between all
+connections and database wrappers using the same JDBC URL.
+"""
+
+import threading
+
+__all__ = (
+    'clear_capabilities',
+    'get_capabilities',
+)
+
+_capabilities = {}
+_capabilities_lock = threading.RLock()
+
+
+def get_capabilities(key, probe):
+    """
+    Gets the capabilities cached for `key`, calling `probe` to determine them
+    if they aren't cached yet. Concurrent callers wait for the first probe
+    instead of probing the server themselves.
+
+    :param key: Key identifying the server, e.g. the JDBC URL
+    :param probe: Callable returning a dictionary of capabilities
+    :return: Dictionary of capabilities
+    """
+    with _capabilities_lock:
+        capabilities = _capabilities.get(key)
+        if capabilities is None:
+            capabilities = _capabilities[key] = probe()
+        return capabilities
+
+
+def clear_capabilities(key=None):
+    """
+    Removes the capabilities cached for `key`, or all cached capabilities,
+    e.g. after a server has been upgraded.
+
+    :param key: Key identifying the server, None clears the whole cache
+    """
+    with _capabilities_lock:
+        if key is None:
+            _capabilities.clear()
+        else:
+            _capabilities.pop(key, None)
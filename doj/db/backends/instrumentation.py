@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Statement level instrumentation of the JDBC cursors. Listeners registered
+with `add_listener` are called with a `StatementEvent` for every statement
+executed by any DOJ backend, once its results have been read. Statements are
+only timed while at least one listener is registered, so the instrumentation
+costs nothing otherwise.
+
+`StatementStatistics` is a listener aggregating a sample of the statements
+into per-statement counters and latency histograms, e.g.::
+
+    from doj.db.backends import instrumentation
+
+    statistics = instrumentation.StatementStatistics(sample_rate=0.1)
+    instrumentation.add_listener(statistics)
+    ...
+    for sql, stats in statistics.slowest(10):
+        print(sql, stats['p99_ms'])
+"""
+
+import logging
+import random
+import threading
+
+from collections import namedtuple
+
+__all__ = (
+    'StatementEvent',
+    'StatementStatistics',
+    'add_listener',
+    'remove_listener',
+)
+
+logger = logging.getLogger('doj.db.backends.instrumentation')
+
+# The registered listeners. The tuple is replaced instead of modified, so the
+# cursors can read it without locking.
+listeners = ()
+_listeners_lock = threading.Lock()
+
+StatementEvent = namedtuple('StatementEvent', [
+    'alias',  # alias of the database, or None
+    'sql',  # SQL with "%s" placeholders instead of the parameter values
+    'many',  # True if executed with executemany
+    'execute_time',  # seconds spent executing the statement
+    'fetch_time',  # seconds spent fetching the result rows
+    'rows',  # number of fetched rows, or the row count of other statements
+])
+
+
+def add_listener(listener):
+    """
+    Registers a callable which is called with a `StatementEvent` for every
+    executed statement. Listeners are called by the thread that executed the
+    statement and should return quickly.
+
+    :param listener: Callable taking a StatementEvent
+    """
+    global listeners
+    with _listeners_lock:
+        if listener not in listeners:
+            listeners = listeners + (listener,)
+
+
+def remove_listener(listener):
+    """
+    Unregisters a listener registered with `add_listener`.
+
+    :param listener: Callable taking a StatementEvent
+    """
+    global listeners
+    with _listeners_lock:
+        listeners = tuple(l for l in listeners if l != listener)
+
+
+def notify(event):
+    """
+    Calls all listeners with `event`. Errors raised by listeners are logged,
+    so they don't affect the statement.
+
+    :param event: StatementEvent
+    """
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception:
+            logger.exception("Statement listener %r failed", listener)
+
+
+class StatementStatistics(object):
+    """
+    A listener collecting statistics about a random sample of the executed
+    statements, grouped by their SQL. The latencies (execute and fetch time)
+    are counted in histograms with power of two buckets of microseconds, so
+    the memory used per statement is constant.
+
+    At most `max_statements` different statements are tracked; events for
+    further statements are only counted as `dropped`.
+    """
+    buckets = 32
+
+    def __init__(self, sample_rate=1.0, max_statements=1000):
+        """
+        :param sample_rate: Fraction of the events recorded, between 0 and 1
+        :param max_statements: Maximum number of statements tracked
+        """
+        self.sample_rate = sample_rate
+        self.max_statements = max_statements
+        self.dropped = 0
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        micros = int((event.execute_time + event.fetch_time) * 1e6)
+        bucket = min(micros.bit_length(), self.buckets - 1)
+
+        with self._lock:
+            stats = self._statements.get(event.sql)
+            if stats is None:
+                if len(self._statements) >= self.max_statements:
+                    self.dropped += 1
+                    return
+                stats = self._statements[event.sql] = {
+                    'count': 0,
+                    'execute_time': 0.0,
+                    'fetch_time': 0.0,
+                    'max_time': 0.0,
+                    'rows': 0,
+                    'histogram': [0] * self.buckets,
+                }
+            stats['count'] += 1
+            stats['execute_time'] += event.execute_time
+            stats['fetch_time'] += event.fetch_time
+            stats['max_time'] = max(stats['max_time'], event.execute_time + event.fetch_time)
+            stats['rows'] += max(event.rows, 0)
+            stats['histogram'][bucket] += 1
+
+    def reset(self):
+        """
+        Discards all collected statistics.
+        """
+        with self._lock:
+            self._statements = {}
+            self.dropped = 0
+
+    def snapshot(self):
+        """
+        Gets the collected statistics.
+
+        :return: Dictionary of {sql: statistics}, where the statistics are
+                 a dictionary of the sampled count, the total execute and
+                 fetch time in seconds, the total number of rows, the maximum
+                 latency, and latency percentiles estimated from the histogram
+                 in milliseconds
+        """
+        with self._lock:
+            statements = [(sql, dict(stats, histogram=list(stats['histogram'])))
+                          for sql, stats in self._statements.items()]
+
+        result = {}
+        for sql, stats in statements:
+            histogram = stats.pop('histogram')
+            stats['p50_ms'] = self._percentile(histogram, stats['count'], 50)
+            stats['p90_ms'] = self._percentile(histogram, stats['count'], 90)
+            stats['p99_ms'] = self._percentile(histogram, stats['count'], 99)
+            stats['max_ms'] = stats.pop('max_time') * 1e3
+            result[sql] = stats
+        return result
+
+    def slowest(self, n=10):
+        """
+        Gets the statements with the highest total latency.
+
+        :param n: Number of statements
+        :return: List of (sql, statistics) tuples, see `snapshot`
+        """
+        statements = self.snapshot().items()
+        statements.sort(key=lambda item: item[1]['execute_time'] + item[1]['fetch_time'], reverse=True)
+        return statements[:n]
+
+    @staticmethod
+    def _percentile(histogram, count, percent):
+        """
+        Estimates a percentile as the upper bound of the histogram bucket
+        containing it.
+
+        :return: Latency in milliseconds
+        """
+        rank = count * percent / 100.0
+        seen = 0
+        for bucket, bucket_count in enumerate(histogram):
+            seen += bucket_count
+            if seen >= rank:
+                return (2 ** bucket) / 1e3
+        return (2 ** (len(histogram) - 1)) / 1e3
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Publishes metrics of the DOJ database backends through JMX. If the OPTIONS of
+a database contain ``'JMX': True``, an MBean named
+``doj.db:type=Database,alias=<alias>`` is registered with the platform MBean
+server. It aggregates the counters of all database wrappers of the alias,
+which Django creates per thread, so the database layer can be monitored with
+the tools of the servlet container.
+"""
+
+import logging
+import threading
+import weakref
+
+from jarray import array
+
+from java.lang import Double, Long, UnsupportedOperationException
+from java.lang.management import ManagementFactory
+from java.util.concurrent.atomic import AtomicLong
+from javax.management import (Attribute, AttributeList, AttributeNotFoundException, DynamicMBean,
+                              InstanceAlreadyExistsException, MBeanAttributeInfo, MBeanInfo, ObjectName,
+                              ReflectionException)
+
+from doj.db.backends import instrumentation
+
+__all__ = (
+    'DatabaseMetrics',
+    'get_metrics',
+)
+
+logger = logging.getLogger('doj.db.backends.jmx')
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def get_metrics(alias):
+    """
+    Gets the metrics of a database alias, registering its MBean on first use.
+
+    :param alias: Alias of the database
+    :return: DatabaseMetrics
+    """
+    with _metrics_lock:
+        metrics = _metrics.get(alias)
+        if metrics is None:
+            metrics = _metrics[alias] = DatabaseMetrics(alias)
+            instrumentation.add_listener(metrics)
+            _register(metrics)
+        return metrics
+
+
+def _object_name(alias):
+    value = alias if ObjectName.quote(alias)[1:-1] == alias else ObjectName.quote(alias)
+    return ObjectName('doj.db:type=Database,alias=%s' % value)
+
+
+def _register(metrics):
+    """
+    Registers the MBean of `metrics` with the platform MBean server, replacing
+    the MBean of a previously deployed application. Errors are only logged,
+    as the database is usable without the MBean.
+    """
+    try:
+        server = ManagementFactory.getPlatformMBeanServer()
+        name = _object_name(metrics.alias)
+        try:
+            server.registerMBean(DatabaseMBean(metrics), name)
+        except InstanceAlreadyExistsException:
+            server.unregisterMBean(name)
+            server.registerMBean(DatabaseMBean(metrics), name)
+    except Exception:
+        logger.warning("Could not register the JMX MBean of database '%s'", metrics.alias, exc_info=True)
+
+
+def _hit_rate(hits, misses):
+    lookups = hits + misses
+    return float(hits) / lookups if lookups else 0.0
+
+
+class DatabaseMetrics(object):
+    """
+    Counters of a database alias. Connections, statements and cache lookups
+    are counted as they happen, so the counters never decrease when a
+    database wrapper is garbage collected. Only the open connections are
+    counted over the live wrappers when read.
+    """
+    def __init__(self, alias):
+        self.alias = alias
+        self.pool = None
+        self.connections_opened = 0
+        self.connect_time = 0.0
+        self.statements = 0
+        self.execute_time = 0.0
+        self.fetch_time = 0.0
+        self.rows = 0
+        # Counted by the cache lookups of all threads, without a lock
+        self.sql_cache_hits = AtomicLong()
+        self.sql_cache_misses = AtomicLong()
+        self.statement_cache_hits = AtomicLong()
+        self.statement_cache_misses = AtomicLong()
+        self._wrappers = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def add_wrapper(self, wrapper):
+        """
+        Adds a database wrapper of the alias, whose connection is included
+        in the metrics while it exists.
+        """
+        with self._lock:
+            self._wrappers.add(wrapper)
+
+    def connection_opened(self, connect_time, pool=None):
+        """
+        Counts a connection opened or borrowed from `pool` by a wrapper.
+
+        :param connect_time: Seconds it took to get the connection
+        :param pool: ConnectionPool the connection was borrowed from, if any
+        """
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_time += connect_time
+            if pool is not None:
+                self.pool = pool
+
+    def sql_cache_lookup(self, hit):
+        """
+        Counts a lookup in the SQL cache of a wrapper, see `LRUCache`.
+        """
+        (self.sql_cache_hits if hit else self.sql_cache_misses).incrementAndGet()
+
+    def statement_cache_lookup(self, hit):
+        """
+        Counts a lookup in the statement cache of a wrapper, see `LRUCache`.
+        """
+        (self.statement_cache_hits if hit else self.statement_cache_misses).incrementAndGet()
+
+    def __call__(self, event):
+        if event.alias != self.alias:
+            return
+        with self._lock:
+            self.statements += 1
+            self.execute_time += event.execute_time
+            self.fetch_time += event.fetch_time
+            self.rows += max(event.rows, 0)
+
+    def get_values(self):
+        """
+        :return: Dictionary of all attributes of the MBean
+        """
+        with self._lock:
+            wrappers = list(self._wrappers)
+            values = {
+                'ConnectionsOpened': self.connections_opened,
+                'AverageConnectTimeMillis':
+                    self.connect_time * 1e3 / self.connections_opened if self.connections_opened else 0.0,
+                'Statements': self.statements,
+                'ExecuteTimeMillis': self.execute_time * 1e3,
+                'FetchTimeMillis': self.fetch_time * 1e3,
+                'Rows': self.rows,
+            }
+            pool = self.pool
+
+        sql_cache_hits = self.sql_cache_hits.get()
+        sql_cache_misses = self.sql_cache_misses.get()
+        statement_cache_hits = self.statement_cache_hits.get()
+        statement_cache_misses = self.statement_cache_misses.get()
+        values.update({
+            'OpenConnections': sum(1 for wrapper in wrappers if wrapper.connection is not None),
+            'PoolSize': pool.size if pool is not None else 0,
+            'PoolIdle': pool.idle if pool is not None else 0,
+            'SqlCacheHits': sql_cache_hits,
+            'SqlCacheMisses': sql_cache_misses,
+            'SqlCacheHitRate': _hit_rate(sql_cache_hits, sql_cache_misses),
+            'StatementCacheHits': statement_cache_hits,
+            'StatementCacheMisses': statement_cache_misses,
+            'StatementCacheHitRate': _hit_rate(statement_cache_hits, statement_cache_misses),
+        })
+        return values
+
+
+class DatabaseMBean(DynamicMBean):
+    """
+    A read-only MBean publishing the values of a DatabaseMetrics instance.
+    """
+    attributes = (
+        ('OpenConnections', Long, "Connections currently used by database wrappers"),
+        ('PoolSize', Long, "Connections held by the connection pool, borrowed or idle"),
+        ('PoolIdle', Long, "Idle connections of the connection pool"),
+        ('ConnectionsOpened', Long, "Connections opened or borrowed from the pool"),
+        ('AverageConnectTimeMillis', Double, "Average time to open or borrow a connection"),
+        ('Statements', Long, "Executed statements"),
+        ('ExecuteTimeMillis', Double, "Total time spent executing statements"),
+        ('FetchTimeMillis', Double, "Total time spent fetching results"),
+        ('Rows', Long, "Fetched rows, or rows changed by other statements"),
+        ('SqlCacheHits', Long, "Hits of the placeholder rewrite caches"),
+        ('SqlCacheMisses', Long, "Misses of the placeholder rewrite caches"),
+        ('SqlCacheHitRate', Double, "Hit rate of the placeholder rewrite caches"),
+        ('StatementCacheHits', Long, "Hits of the prepared statement caches"),
+        ('StatementCacheMisses', Long, "Misses of the prepared statement caches"),
+        ('StatementCacheHitRate', Double, "Hit rate of the prepared statement caches"),
+    )
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._types = dict((name, java_type) for name, java_type, _ in self.attributes)
+
+    def getAttribute(self, name):
+        if name not in self._types:
+            raise AttributeNotFoundException(name)
+        return self._types[name](self.metrics.get_values()[name])
+
+    def getAttributes(self, names):
+        values = self.metrics.get_values()
+        result = AttributeList()
+        for name in names:
+            if name in self._types:
+                result.add(Attribute(name, self._types[name](values[name])))
+        return result
+
+    def setAttribute(self, attribute):
+        raise AttributeNotFoundException("%s is read-only" % attribute.getName())
+
+    def setAttributes(self, attributes):
+        return AttributeList()
+
+    def invoke(self, action, params, signature):
+        raise ReflectionException(UnsupportedOperationException(action))
+
+    def getMBeanInfo(self):
+        attributes = [MBeanAttributeInfo(name, java_type.getName(), description, True, False, False)
+                      for name, java_type, description in self.attributes]
+        return MBeanInfo(
+            self.__class__.__name__,
+            "Metrics of the database '%s'" % self.metrics.alias,
+            array(attributes, MBeanAttributeInfo),
+            None, None, None,
+        )
@@ -15,6 +15,7 @@ from doj.db.backends import JDBCBaseDatabaseFeatures as BaseDatabaseFeatures
 from doj.db.backends import JDBCBaseDatabaseClient as BaseDatabaseClient
 from doj.db.backends import JDBCBaseDatabaseValidation as BaseDatabaseValidation
 from doj.db.backends import JDBCCursorWrapper as CursorWrapper
+from doj.db.backends.utils import LRUCache
 
 from doj.db.backends.mssql.introspection import DatabaseIntrospection
 from doj.db.backends.mssql.creation import DatabaseCreation
@@ -36,7 +37,11 @@ IntegrityError = BaseDatabaseWrapper.IntegrityError
 
 class DatabaseFeatures(BaseDatabaseFeatures):
     uses_custom_query_class = True
-    has_bulk_insert = False
+    has_bulk_insert = True
+
+    # Multi-row inserts return the generated IDs with an OUTPUT clause, so
+    # bulk_create() sets the primary keys of the created objects.
+    can_return_ids_from_bulk_insert = True
 
     # DateTimeField doesn't support timezones, only DateTimeOffsetField
     supports_timezones = False
@@ -161,6 +166,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         except ValueError:
             self.cast_avg_to_float = False
 
+        # Caches the ROW_NUMBER() rewrites of sliced queries, keyed on the
+        # SQL without limits.
+        self.pagination_cache = LRUCache(self.get_option('SQL_CACHE_SIZE', self.default_sql_cache_size))
+
         self.features = DatabaseFeatures(self)
         self.ops = DatabaseOperations(self)
         self.client = BaseDatabaseClient(self)
@@ -171,6 +180,20 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     def init_connection_state(self):
         pass
 
+    @cached_property
+    def sql_server_version(self):
+        """
+        :return: Major version of the server, e.g. VERSION_SQL2012
+        """
+        return self.get_server_capabilities()['version']
+
+    def probe_server_capabilities(self):
+        with self.temporary_connection() as cursor:
+            cursor.execute("SELECT CAST(SERVERPROPERTY('ProductVersion') AS varchar)")
+            return {
+                'version': int(cursor.fetchone()[0].split('.')[0]),
+            }
+
     def disable_constraint_checking(self):
         """
         Turn off constraint checking for every table
@@ -217,13 +240,5 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                 'time': '0.000',
             })
 
-    def is_usable(self):
-        try:
-            self.connection.cursor().execute("SELECT 1")
-        except self.Error:
-            return False
-        else:
-            return True
-
     def schema_editor(self, *args, **kwargs):
         return DatabaseSchemaEditor(self, *args, **kwargs)
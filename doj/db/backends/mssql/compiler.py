@@ -2,15 +2,12 @@
 
 from __future__ import absolute_import, unicode_literals
 
-try:
-    from itertools import zip_longest
-except ImportError:
-    from itertools import izip_longest as zip_longest
-
 import django
 from django.db.models.sql import compiler
 import re
 
+from doj.db.backends.mssql.base import VERSION_SQL2012
+
 NEEDS_AGGREGATES_FIX = django.VERSION[:2] < (1, 7)
 
 # query_class returns the base class to use for Django queries.
@@ -60,19 +57,6 @@ def _break(s, find):
 
 
 class SQLCompiler(compiler.SQLCompiler):
-    def resolve_columns(self, row, fields=()):
-        values = []
-        index_extra_select = len(self.query.extra_select)
-        for value, field in zip_longest(row[index_extra_select:], fields):
-            # print '\tfield=%s\tvalue=%s' % (repr(field), repr(value))
-            if field:
-                try:
-                    value = self.connection.ops.convert_values(value, field)
-                except ValueError:
-                    pass
-            values.append(value)
-        return row[:index_extra_select] + tuple(values)
-
     def compile(self, node, select_format=False):
         """
         Added with Django 1.7 as a mechanism to evalute expressions
@@ -139,9 +123,73 @@ class SQLCompiler(compiler.SQLCompiler):
             sql = re.sub(r'(?i)^{0}'.format(_select), '{0} TOP {1}'.format(_select, self.query.high_mark), raw_sql, 1)
             return sql, fields
 
+        # SQL Server 2012 supports paging with OFFSET and FETCH
+        if self.connection.sql_server_version >= VERSION_SQL2012:
+            sql = self._offset_fetch_sql(raw_sql)
+            if sql is not None:
+                return sql, fields
+
         # Else we have limits; rewrite the query using ROW_NUMBER()
         self._using_row_number = True
 
+        where_row_num = '{0} < _row_num'.format(self.query.low_mark)
+        if self.query.high_mark:
+            where_row_num += ' and _row_num <= {0}'.format(self.query.high_mark)
+
+        # The rewrite only depends on the SQL without limits, so it's cached
+        # for repeated queries with different slices.
+        pagination_cache = self.connection.pagination_cache
+        sql = pagination_cache.get(raw_sql)
+        if sql is None:
+            sql = self._row_number_sql(raw_sql)
+            pagination_cache.put(raw_sql, sql)
+
+        return sql + where_row_num, fields
+
+    def _offset_fetch_sql(self, raw_sql):
+        """
+        Limits a query using ORDER BY ... OFFSET ... FETCH.
+
+        :param raw_sql: SQL of the query without limits
+        :return: SQL of the limited query, or None if the query can't be
+                 limited this way
+        """
+        order = _get_order_limit_offset(raw_sql)[0]
+        if order is None:
+            # OFFSET requires an ordering. Order by the primary key, unless
+            # the query is distinct or grouped, or doesn't select the key,
+            # which can't be used for the ordering then.
+            if self.query.distinct or self.query.group_by is not None or not self._selects_pk(raw_sql):
+                return None
+            meta = self.query.get_meta()
+            qn = self.connection.ops.quote_name
+            raw_sql += ' ORDER BY {0}.{1} ASC'.format(qn(meta.db_table), qn(meta.pk.column))
+
+        sql = '{0} OFFSET {1} ROWS'.format(raw_sql, self.query.low_mark)
+        if self.query.high_mark is not None:
+            sql += ' FETCH NEXT {0} ROWS ONLY'.format(self.query.high_mark - self.query.low_mark)
+        return sql
+
+    def _selects_pk(self, raw_sql):
+        """
+        Checks if the select list of a query contains the primary key of its
+        model.
+
+        :param raw_sql: SQL of the query without limits
+        """
+        meta = self.query.get_meta()
+        qn = self.connection.ops.quote_name
+        select_list = _break(raw_sql, ' FROM ')[0]
+        return '{0}.{1}'.format(qn(meta.db_table), qn(meta.pk.column)) in select_list
+
+    def _row_number_sql(self, raw_sql):
+        """
+        Rewrites a query to number its rows using ROW_NUMBER().
+
+        :param raw_sql: SQL of the query without limits
+        :return: SQL selecting the numbered rows, up to the WHERE clause
+                 filtering the row numbers
+        """
         # Lop off ORDER... and the initial "SELECT"
         inner_select = _remove_order_limit_offset(raw_sql)
         outer_fields, inner_select = self._alias_columns(inner_select)
@@ -172,21 +220,14 @@ class SQLCompiler(compiler.SQLCompiler):
             inner_as=inner_table_name,
         )
 
-        where_row_num = '{0} < _row_num'.format(self.query.low_mark)
-        if self.query.high_mark:
-            where_row_num += ' and _row_num <= {0}'.format(self.query.high_mark)
-
-        sql = """SELECT _row_num, {outer}
+        return """SELECT _row_num, {outer}
 FROM ( SELECT ROW_NUMBER() OVER ( ORDER BY {order}) as _row_num, {inner}) as QQQ
-WHERE {where}""".format(
+WHERE """.format(
             outer=outer_fields,
             order=order,
             inner=inner_select,
-            where=where_row_num,
         )
 
-        return sql, fields
-
     def _fix_slicing_order(self, outer_fields, inner_select, order, inner_table_name):
         """
         Apply any necessary fixes to the outer_fields, inner_select, and order
@@ -195,11 +236,13 @@ WHERE {where}""".format(
         # Using ROW_NUMBER requires an ordering
         if order is None:
             meta = self.query.get_meta()
-            column = meta.pk.db_column or meta.pk.get_attname()
-            order = '{0}.{1} ASC'.format(
-                inner_table_name,
-                self.connection.ops.quote_name(column),
-            )
+            column = self.connection.ops.quote_name(meta.pk.db_column or meta.pk.get_attname())
+            if column in [x.strip() for x in outer_fields.split(',')]:
+                order = '{0}.{1} ASC'.format(inner_table_name, column)
+            else:
+                # Grouped queries may not select the primary key; their rows
+                # are numbered in no particular order then
+                order = '(SELECT NULL)'
         else:
             alias_id = 0
             # remap order for injected subselect
@@ -311,6 +354,8 @@ class SQLInsertCompiler(compiler.SQLInsertCompiler, SQLCompiler):
     # ... and insert the OUTPUT clause between it and the values list (or DEFAULT VALUES).
     _values_repl = r'\g<prefix> OUTPUT INSERTED.{col} INTO @sqlserver_ado_return_id\g<default>VALUES\g<suffix>'
 
+    return_ids = False
+
     def as_sql(self, *args, **kwargs):
         # Fix for Django ticket #14019
         if not hasattr(self, 'return_id'):
@@ -318,12 +363,91 @@ class SQLInsertCompiler(compiler.SQLInsertCompiler, SQLCompiler):
 
         result = super(SQLInsertCompiler, self).as_sql(*args, **kwargs)
         if isinstance(result, list):
+            if self.return_ids and len(result) == 1 and len(self.query.objs) > 1:
+                # A single multi-row insert
+                return [self._merge_sql(result[0][1])]
             # Django 1.4 wraps return in list
-            return [self._fix_insert(x[0], x[1]) for x in result]
+            result = [self._fix_insert(x[0], x[1]) for x in result]
+            if not self.query.fields and len(result) < len(self.query.objs):
+                # DEFAULT VALUES inserts a single row per statement
+                result *= len(self.query.objs)
+            return result
 
         sql, params = result
         return self._fix_insert(sql, params)
 
+    def execute_sql(self, return_id=False):
+        """
+        Executes the insert. If several objects with an automatically
+        generated primary key are inserted, the generated IDs are read back
+        with the inserted rows and set on the objects.
+        """
+        self.return_ids = not return_id and self._can_return_ids()
+        if not self.return_ids:
+            return super(SQLInsertCompiler, self).execute_sql(return_id)
+
+        self.return_id = False
+        ids = []
+        with self.connection.cursor() as cursor:
+            for sql, params in self.as_sql():
+                cursor.execute(sql, params)
+                ids.extend(row[0] for row in cursor.fetchall())
+
+        # The IDs are returned in the order of the objects
+        meta = self.query.get_meta()
+        for obj, pk in zip(self.query.objs, ids):
+            setattr(obj, meta.pk.attname, pk)
+            obj._state.adding = False
+            obj._state.db = self.using
+
+    def _can_return_ids(self):
+        """
+        Checks if the IDs of the inserted objects are generated by the
+        database and can be returned with the insert.
+        """
+        meta = self.query.get_meta()
+        return (
+            self.connection.features.can_return_ids_from_bulk_insert and
+            meta.has_auto_field and
+            bool(self.query.fields) and
+            meta.auto_field not in self.query.fields and
+            len(self.query.objs) > 1
+        )
+
+    def _merge_sql(self, params):
+        """
+        Inserts multiple rows with a MERGE statement returning their IDs.
+        SQL Server doesn't guarantee that the identity values of an INSERT
+        are generated in the order of its VALUES rows, so the number of each
+        row is output together with its ID instead.
+
+        :param params: Parameters of the rows, concatenated
+        :return: Tuple of SQL and parameters
+        """
+        meta = self.query.get_meta()
+        qn = self.connection.ops.quote_name
+        columns = [qn(field.column) for field in self.query.fields]
+        col = qn(meta.pk.db_column or meta.pk.get_attname())
+        pk_db_type = _re_data_type_terminator.split(meta.pk.db_type(self.connection))[0]
+
+        row_sql = '({0}, {{0}})'.format(', '.join(['%s'] * len(columns)))
+        sql = (
+            'SET NOCOUNT ON;'
+            'DECLARE @sqlserver_ado_return_id table ([_row] int, {col} {pk_type});'
+            'MERGE INTO {table} USING (VALUES {rows}) AS [_source] ({columns}, [_row]) ON 1 = 0 '
+            'WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({source_columns}) '
+            'OUTPUT [_source].[_row], INSERTED.{col} INTO @sqlserver_ado_return_id;'
+            'SELECT {col} FROM @sqlserver_ado_return_id ORDER BY [_row]'
+        ).format(
+            col=col,
+            pk_type=pk_db_type,
+            table=qn(meta.db_table),
+            rows=', '.join(row_sql.format(row) for row in range(len(self.query.objs))),
+            columns=', '.join(columns),
+            source_columns=', '.join('[_source].{0}'.format(column) for column in columns),
+        )
+        return sql, params
+
     def _fix_insert(self, sql, params):
         """
         Wrap the passed SQL with IDENTITY_INSERT statements and apply
@@ -360,7 +484,7 @@ class SQLInsertCompiler(compiler.SQLInsertCompiler, SQLCompiler):
 
         # mangle SQL to return ID from insert
         # http://msdn.microsoft.com/en-us/library/ms177564.aspx
-        if self.return_id and self.connection.features.can_return_id_from_insert:
+        if self.return_ids or (self.return_id and self.connection.features.can_return_id_from_insert):
             col = self.connection.ops.quote_name(meta.pk.db_column or meta.pk.get_attname())
 
             # Determine datatype for use with the table variable that will return the inserted ID
@@ -78,6 +78,7 @@ class DatabaseCreation(BaseDatabaseCreation):
 
         for alias in connections:
             connections[alias].close()
+        self.connection.close_connection_pools()
         try:
             with self.connection.cursor() as cursor:
                 qn_db_name = self.connection.ops.quote_name(test_database_name)
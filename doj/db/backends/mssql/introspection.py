@@ -2,14 +2,70 @@
 
 from __future__ import absolute_import, unicode_literals
 
+import weakref
+
 from doj.db.backends import JDBCBaseDatabaseIntrospection as BaseDatabaseIntrospection
 from doj.db.backends import JDBCBaseDatabaseWrapper as BaseDatabaseWrapper
 
 from doj.db.backends import JDBCFieldInfo as FieldInfo
 from doj.db.backends import JDBCTableInfo as TableInfo
 
+Database = BaseDatabaseWrapper.Database
+
 AUTO_FIELD_MARKER = -777555
 
+# Maps the system types of MSSQL to the JDBC types reported by the driver
+COLUMN_TYPES = {
+    'bigint': Database.BIGINT,
+    'binary': Database.BINARY,
+    'bit': Database.BIT,
+    'char': Database.CHAR,
+    'date': Database.DATE,
+    'datetime': Database.TIMESTAMP,
+    'datetime2': Database.TIMESTAMP,
+    'datetimeoffset': Database.NVARCHAR,
+    'decimal': Database.DECIMAL,
+    'float': Database.DOUBLE,
+    'geography': Database.VARBINARY,
+    'geometry': Database.VARBINARY,
+    'hierarchyid': Database.VARBINARY,
+    'image': Database.LONGVARBINARY,
+    'int': Database.INTEGER,
+    'money': Database.DECIMAL,
+    'nchar': Database.NCHAR,
+    'ntext': Database.LONGNVARCHAR,
+    'numeric': Database.DECIMAL,
+    'nvarchar': Database.NVARCHAR,
+    'real': Database.REAL,
+    'rowversion': Database.BINARY,
+    'smalldatetime': Database.TIMESTAMP,
+    'smallint': Database.SMALLINT,
+    'smallmoney': Database.DECIMAL,
+    'sql_variant': Database.VARCHAR,
+    'text': Database.LONGVARCHAR,
+    'time': Database.TIME,
+    'timestamp': Database.BINARY,
+    'tinyint': Database.TINYINT,
+    'uniqueidentifier': Database.CHAR,
+    'varbinary': Database.VARBINARY,
+    'varchar': Database.VARCHAR,
+    'xml': Database.LONGNVARCHAR,
+}
+
+# Sizes the driver reports for the types it returns as strings or bytes
+FIXED_SIZES = {
+    'datetimeoffset': 34,
+    'rowversion': 8,
+    'sql_variant': 8000,
+    'timestamp': 8,
+    'uniqueidentifier': 36,
+}
+
+# Types whose size is given in bytes instead of digits
+CHARACTER_TYPES = frozenset(['binary', 'char', 'nchar', 'nvarchar', 'varbinary', 'varchar'])
+UNICODE_TYPES = frozenset(['nchar', 'nvarchar'])
+MAX_CHARACTER_LENGTH = 2147483647
+
 
 class DatabaseIntrospection(BaseDatabaseIntrospection):
     data_types_reverse = BaseDatabaseIntrospection.data_types_reverse
@@ -17,6 +73,12 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         AUTO_FIELD_MARKER: 'AutoField',
     })
 
+    def __init__(self, *args, **kwargs):
+        super(DatabaseIntrospection, self).__init__(*args, **kwargs)
+        # Column metadata per cursor, so an introspection session like
+        # inspectdb reads every table only once
+        self._columns_cache = weakref.WeakKeyDictionary()
+
     def get_field_type(self, data_type, description):
         field_type = self.data_types_reverse[data_type]
         if (field_type == 'CharField'
@@ -37,17 +99,31 @@ FROM INFORMATION_SCHEMA.VIEWS
 """)
         return [TableInfo(row[0], row[1]) for row in cursor.fetchall()]
 
-    def _is_auto_field(self, cursor, table_name, column_name):
+    def _get_columns(self, cursor, table_name):
         """
-        Check if a column is an identity column.
-
-        See: http://msdn2.microsoft.com/en-us/library/ms174968.aspx
+        Reads the metadata of all columns of a table with a single catalog
+        query, as a list of (name, type, size, precision, scale, is_nullable,
+        is_identity) tuples. The result is cached for the given cursor.
         """
-        sql = "SELECT COLUMNPROPERTY(OBJECT_ID(N'%s'), N'%s', 'IsIdentity')" % \
-            (table_name, column_name)
-
-        cursor.execute(sql)
-        return cursor.fetchone()[0]
+        try:
+            columns_by_table = self._columns_cache[cursor]
+        except KeyError:
+            columns_by_table = self._columns_cache[cursor] = dict()
+        except TypeError:
+            # The cursor doesn't support weak references
+            columns_by_table = dict()
+
+        columns = columns_by_table.get(table_name)
+        if columns is None:
+            cursor.execute("""\
+SELECT c.name, COALESCE(TYPE_NAME(c.system_type_id), TYPE_NAME(c.user_type_id)),
+    c.max_length, c.precision, c.scale, c.is_nullable, c.is_identity
+FROM sys.columns c
+WHERE c.object_id = OBJECT_ID(%s)
+ORDER BY c.column_id
+""", [self.connection.ops.quote_name(table_name)])
+            columns = columns_by_table[table_name] = list(cursor.fetchall())
+        return columns
 
     def get_table_description(self, cursor, table_name, identity_check=True):
         """Return a description of the table, with DB-API cursor.description interface.
@@ -59,28 +135,31 @@ FROM INFORMATION_SCHEMA.VIEWS
         When a field is found with an IDENTITY property, it is given a custom field number
         of AUTOFIELD, which maps to the 'AutoField' value in the DATA_TYPES_REVERSE dict.
         """
-        cursor.execute("SELECT * FROM [%s] where 1=0" % (table_name))
-        columns = cursor.description
-
         items = list()
-        for column in columns:
-            column = list(column)  # Convert tuple to list
-
-            if identity_check and self._is_auto_field(cursor, table_name, column[0]):
-                column[1] = AUTO_FIELD_MARKER
-            if column[1] == BaseDatabaseWrapper.Database.NVARCHAR and column[3] < 4000:
-                column[1] = BaseDatabaseWrapper.Database.NCHAR
-            items.append(FieldInfo(*column))
+        for name, type_name, max_length, precision, scale, is_nullable, is_identity in \
+                self._get_columns(cursor, table_name):
+            type_code = COLUMN_TYPES.get(type_name, Database.OTHER)
+            if type_name in CHARACTER_TYPES:
+                if max_length == -1:
+                    # varchar(max) and the like
+                    size = MAX_CHARACTER_LENGTH
+                else:
+                    size = max_length
+                if type_name in UNICODE_TYPES:
+                    size //= 2
+            elif type_name in FIXED_SIZES:
+                size = FIXED_SIZES[type_name]
+            else:
+                size = precision
+
+            if identity_check and is_identity:
+                type_code = AUTO_FIELD_MARKER
+            if type_code == Database.NVARCHAR and size < 4000:
+                type_code = Database.NCHAR
+            items.append(FieldInfo(name, type_code, None, size, precision, scale, bool(is_nullable)))
 
         return items
 
-    def _name_to_index(self, cursor, table_name):
-        """
-        Returns a dictionary of {field_name: field_index} for the given table.
-        Indexes are 0-based.
-        """
-        return dict([(d[0], i) for i, d in enumerate(self.get_table_description(cursor, table_name, identity_check=False))])
-
     def _name_to_index(self, cursor, table_name):
         """Return a dictionary of {field_name: field_index} for the given table.
 
@@ -135,7 +214,6 @@ where
         Backends can override this to return a list of (column_name, referenced_table_name,
         referenced_column_name) for all key columns in given table.
         """
-        source_field_dict = self._name_to_index(cursor, table_name)
 
         sql = """
 select
@@ -231,7 +309,7 @@ where
         select object_id, name, index_id, is_unique, is_primary_key
         from sys.indexes where object_id = OBJECT_ID(%s)
         """
-        cursor.execute(sql, [table_name])
+        cursor.execute(sql, [self.connection.ops.quote_name(table_name)])
         for object_id, name, index_id, unique, primary_key in list(cursor.fetchall()):
             sql = """
             select name from sys.index_columns ic
@@ -255,7 +333,7 @@ where
         inner join sys.tables rt on fk.referenced_object_id = rt.object_id
         where fk.parent_object_id = OBJECT_ID(%s)
         """
-        cursor.execute(sql, [table_name])
+        cursor.execute(sql, [self.connection.ops.quote_name(table_name)])
         for id, name, ref_table_name in list(cursor.fetchall()):
             sql = """
             select cc.name, rc.name from sys.foreign_key_columns fkc
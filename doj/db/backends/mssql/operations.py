@@ -3,8 +3,9 @@
 from __future__ import absolute_import, unicode_literals
 
 import datetime
+import functools
 
-from django.db.models import DateTimeField
+from django.db.models import DateField, DateTimeField
 from django.conf import settings
 from django.utils.encoding import smart_text
 from django.utils import six, timezone
@@ -18,6 +19,11 @@ except ImportError:
     pytz = None
 
 
+# Field instances converting the date strings returned by the JDBC driver
+_date_field = DateField()
+_datetime_field = DateTimeField()
+
+
 class DatabaseOperations(BaseDatabaseOperations):
     compiler_module = "doj.db.backends.mssql.compiler"
 
@@ -30,6 +36,10 @@ class DatabaseOperations(BaseDatabaseOperations):
         'VAR_POP': ('VARP', None),
     }
 
+    # SQL Server accepts fewer than 2100 parameters per statement
+    max_query_params = 2099
+    max_insert_rows = 1000
+
     def __init__(self, *args, **kwargs):
         super(DatabaseOperations, self).__init__(*args, **kwargs)
 
@@ -200,23 +210,29 @@ class DatabaseOperations(BaseDatabaseOperations):
 
         # Cannot use TRUNCATE on tables that are referenced by a FOREIGN KEY; use DELETE instead.
         # (which is slow)
-
         with self.connection.cursor() as cursor:
-            # Try to minimize the risks of the braindeaded inconsistency in
-            # DBCC CHEKIDENT(table, RESEED, n) behavior.
-            seqs = []
-            for seq in sequences:
-                cursor.execute("SELECT COUNT(*) FROM %s" % self.quote_name(seq["table"]))
-                rowcnt = cursor.fetchone()[0]
-                elem = dict()
-
-                if rowcnt:
-                    elem['start_id'] = 0
-                else:
-                    elem['start_id'] = 1
+            referenced_tables = self._get_referenced_tables(cursor)
+            deleted_tables = [t for t in tables if t.lower() in referenced_tables]
+            row_counts = self._get_row_counts(cursor, [seq['table'] for seq in sequences
+                                                       if seq['table'].lower() in referenced_tables])
+
+        # TRUNCATE resets the identity of a table, so only the tables emptied
+        # with DELETE need to be reseeded.
+        # Try to minimize the risks of the braindeaded inconsistency in
+        # DBCC CHEKIDENT(table, RESEED, n) behavior.
+        seqs = []
+        for seq in sequences:
+            if seq['table'].lower() not in referenced_tables:
+                continue
+            elem = dict()
+
+            if row_counts.get(seq['table'].lower()):
+                elem['start_id'] = 0
+            else:
+                elem['start_id'] = 1
 
-                elem.update(seq)
-                seqs.append(elem)
+            elem.update(seq)
+            seqs.append(elem)
 
         sql_list = list()
 
@@ -224,12 +240,19 @@ class DatabaseOperations(BaseDatabaseOperations):
         sql_list.append('EXEC sp_MSforeachtable "ALTER TABLE ? NOCHECK CONSTRAINT all"')
 
         # Delete data from tables.
+        sql_list.extend(
+            ['%s %s %s;' % (
+                style.SQL_KEYWORD('TRUNCATE'),
+                style.SQL_KEYWORD('TABLE'),
+                style.SQL_FIELD(self.quote_name(t))
+            ) for t in tables if t not in deleted_tables]
+        )
         sql_list.extend(
             ['%s %s %s;' % (
                 style.SQL_KEYWORD('DELETE'),
                 style.SQL_KEYWORD('FROM'),
                 style.SQL_FIELD(self.quote_name(t))
-            ) for t in tables]
+            ) for t in deleted_tables]
         )
 
         # Reset the counters on each table.
@@ -250,6 +273,33 @@ class DatabaseOperations(BaseDatabaseOperations):
 
         return sql_list
 
+    def _get_referenced_tables(self, cursor):
+        """
+        Returns the lower case names of all tables referenced by a foreign key
+        of another table. A table referencing only itself can be truncated.
+        """
+        cursor.execute("""
+        SELECT DISTINCT OBJECT_NAME(referenced_object_id) FROM sys.foreign_keys
+        WHERE referenced_object_id <> parent_object_id
+        """)
+        return set(row[0].lower() for row in cursor.fetchall())
+
+    def _get_row_counts(self, cursor, tables):
+        """
+        Returns a dictionary of {lower case table name: row count} for the
+        given tables. The counts are read from the catalog instead of
+        counting the rows of every table.
+        """
+        if not tables:
+            return dict()
+
+        cursor.execute("""
+        SELECT OBJECT_NAME(object_id), SUM(rows) FROM sys.partitions
+        WHERE index_id IN (0, 1) AND object_id IN (%s)
+        GROUP BY object_id
+        """ % ', '.join(['OBJECT_ID(%s)'] * len(tables)), [self.quote_name(t) for t in tables])
+        return dict((row[0].lower(), row[1]) for row in cursor.fetchall())
+
     def tablespace_sql(self, tablespace, inline=False):
         return "ON %s" % self.quote_name(tablespace)
 
@@ -323,18 +373,44 @@ class DatabaseOperations(BaseDatabaseOperations):
             second = timezone.make_aware(second, tz)
         return [self.value_to_db_datetime(first), self.value_to_db_datetime(second)]
 
-    def convert_values(self, value, field):
+    # MSSQL needs help with date fields that might come out as strings. The
+    # converters are looked up by the internal type of the field.
+    value_converters = {
+        'DateField': lambda value: _date_field.to_python(convert_microsoft_date_to_isoformat(value)),
+        'DateTimeField': lambda value: _datetime_field.to_python(convert_microsoft_date_to_isoformat(value)),
+    }
+
+    def get_value_converter(self, field):
         """
-        MSSQL needs help with date fields that might come out as strings.
+        Gets the function converting values of `field` returned by the JDBC
+        driver as strings.
+
+        :param field: Field instance
+        :return: Callable taking a string, or None if no conversion is needed
         """
-        if field:
-            internal_type = field.get_internal_type()
-            if internal_type in ('DateField', 'DateTimeField'):
-                value = DateTimeField().to_python(convert_microsoft_date_to_isoformat(value))
-            else:
-                value = super(DatabaseOperations, self).convert_values(value, field)
+        return self.value_converters.get(field.get_internal_type())
+
+    def get_db_converters(self, expression):
+        converters = super(DatabaseOperations, self).get_db_converters(expression)
+        convert = self.get_value_converter(expression.output_field)
+        if convert is not None:
+            converters.append(functools.partial(self.convert_string_value, convert))
+        return converters
+
+    @staticmethod
+    def convert_string_value(convert, value, expression, connection, context):
+        # Values of the column type are returned as is
+        if isinstance(value, six.string_types):
+            value = convert(value)
         return value
 
+    def bulk_batch_size(self, fields, objs):
+        """
+        MSSQL accepts fewer than 2100 parameters per statement and up to 1000
+        rows in a VALUES clause.
+        """
+        return min(self.max_insert_rows, self.max_query_params // max(len(fields), 1))
+
     def bulk_insert_sql(self, fields, num_values):
         """
         Format the SQL for bulk insert
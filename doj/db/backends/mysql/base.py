@@ -9,8 +9,9 @@ from __future__ import unicode_literals
 
 import re
 
+from java.lang import Integer
+
 from django.conf import settings
-from django.db import utils
 from django.utils.encoding import force_text
 from django.utils.functional import cached_property
 from django.utils import six
@@ -75,16 +76,7 @@ class DatabaseFeatures(BaseDatabaseFeatures):
         Internal method used in Django tests. Don't rely on this from your code"
         :return: Table type
         """
-        with self.connection.cursor() as cursor:
-            cursor.execute('CREATE TABLE INTROSPECT_TEST (X INT)')
-            # This command is MySQL specific; the second column
-            # will tell you the default table type of the created
-            # table. Since all Django's test tables will have the same
-            # table type, that's enough to evaluate the feature.
-            cursor.execute("SHOW TABLE STATUS WHERE Name='INTROSPECT_TEST'")
-            result = cursor.fetchone()
-            cursor.execute('DROP TABLE INTROSPECT_TEST')
-        return result[1]
+        return self.connection.get_server_capabilities()['storage_engine']
 
     @cached_property
     def can_introspect_foreign_keys(self):
@@ -307,6 +299,9 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     jdbc_default_host = 'localhost'
     jdbc_default_port = 3306
     jdbc_default_name = 'mysql'
+    jdbc_batch_connection_properties = {
+        'rewriteBatchedStatements': 'true',
+    }
     # This dictionary maps Field objects to their associated MySQL column
     # types, as strings. Column-type strings can contain format strings; they'll
     # be interpolated against the values of Field.__dict__ before being output.
@@ -406,63 +401,39 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         finally:
             self.needs_rollback = needs_rollback
 
-    def check_constraints(self, table_names=None):
-        """
-        Checks each table name in `table_names` for rows with invalid foreign key references. This method is
-        intended to be used in conjunction with `disable_constraint_checking()` and `enable_constraint_checking()`, to
-        determine if rows with invalid references were entered while constraint checks were off.
-
-        Raises an IntegrityError on the first invalid foreign key reference encountered (if any) and provides
-        detailed information about the invalid reference in the error message.
-
-        Backends can override this method if they can more directly apply constraint checking (e.g. via "SET CONSTRAINTS
-        ALL IMMEDIATE")
-        """
-        cursor = self.cursor()
-        if table_names is None:
-            table_names = self.introspection.table_names(cursor)
-        for table_name in table_names:
-            primary_key_column_name = self.introspection.get_primary_key_column(cursor, table_name)
-            if not primary_key_column_name:
-                continue
-            key_columns = self.introspection.get_key_columns(cursor, table_name)
-            for column_name, referenced_table_name, referenced_column_name in key_columns:
-                cursor.execute("""
-                    SELECT REFERRING.`%s`, REFERRING.`%s` FROM `%s` as REFERRING
-                    LEFT JOIN `%s` as REFERRED
-                    ON (REFERRING.`%s` = REFERRED.`%s`)
-                    WHERE REFERRING.`%s` IS NOT NULL AND REFERRED.`%s` IS NULL"""
-                    % (primary_key_column_name, column_name, table_name, referenced_table_name,
-                    column_name, referenced_column_name, column_name, referenced_column_name))
-                for bad_row in cursor.fetchall():
-                    raise utils.IntegrityError("The row in table '%s' with primary key '%s' has an invalid "
-                        "foreign key: %s.%s contains a value '%s' that does not have a corresponding value in %s.%s."
-                        % (table_name, bad_row[0],
-                        table_name, column_name, bad_row[1],
-                        referenced_table_name, referenced_column_name))
-
     def schema_editor(self, *args, **kwargs):
         """
         Returns a new instance of this backend's SchemaEditor
         """
         return DatabaseSchemaEditor(self, *args, **kwargs)
 
-    def is_usable(self):
-        try:
-            self.connection.cursor().execute("SELECT 1")
-        except self.Error:
-            return False
-        else:
-            return True
-
     @cached_property
     def mysql_version(self):
-        with self.temporary_connection():
-            server_info = self.connection.get_server_info()
+        return self.get_server_capabilities()['version']
+
+    def probe_server_capabilities(self):
+        with self.temporary_connection() as cursor:
+            cursor.execute('SELECT VERSION()')
+            server_info = cursor.fetchone()[0]
+            # All of Django's test tables are created with the default storage
+            # engine, so that's enough to evaluate the features depending on it.
+            cursor.execute("SELECT ENGINE FROM information_schema.ENGINES WHERE SUPPORT = 'DEFAULT'")
+            storage_engine = cursor.fetchone()[0]
+            cursor.execute('SELECT @@lower_case_table_names')
+            lower_case_table_names = int(cursor.fetchone()[0])
         match = server_version_re.match(server_info)
         if not match:
             raise Exception('Unable to determine MySQL version from version string %r' % server_info)
-        return tuple(int(x) for x in match.groups())
+        return {
+            'version': tuple(int(x) for x in match.groups()),
+            'storage_engine': storage_engine,
+            'lower_case_table_names': lower_case_table_names,
+        }
+
+    def set_statement_fetch_size(self, statement, fetch_size):
+        # Connector/J only streams result sets row by row with a fetch size
+        # of Integer.MIN_VALUE; any other value reads the whole result set.
+        statement.setFetchSize(Integer.MIN_VALUE)
 
     @staticmethod
     def _set_default_isolation_level(connection):
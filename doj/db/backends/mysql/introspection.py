@@ -98,6 +98,37 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         key_columns.extend(cursor.fetchall())
         return key_columns
 
+    def get_key_columns_by_table(self, cursor, table_names):
+        """
+        Reads the primary and foreign key columns of all tables of the
+        database with one query on information_schema. Table names are
+        matched case-insensitively if the server sets lower_case_table_names.
+        """
+        cursor.execute("""
+            SELECT table_name, column_name, constraint_name, referenced_table_name, referenced_column_name
+            FROM information_schema.key_column_usage
+            WHERE table_schema = DATABASE()
+                AND (constraint_name = 'PRIMARY' OR referenced_table_name IS NOT NULL)
+            ORDER BY table_name, constraint_name, ordinal_position""")
+
+        if self.connection.get_server_capabilities().get('lower_case_table_names'):
+            normalize = lambda name: name.lower()
+        else:
+            normalize = lambda name: name
+
+        key_columns = dict((normalize(table_name), (None, [])) for table_name in table_names)
+        for table_name, column_name, constraint_name, referenced_table_name, referenced_column_name in cursor.fetchall():
+            table_name = normalize(table_name)
+            if table_name not in key_columns:
+                continue
+            primary_key_column, columns = key_columns[table_name]
+            if constraint_name == 'PRIMARY':
+                if primary_key_column is None:
+                    key_columns[table_name] = (column_name, columns)
+            elif referenced_column_name is not None:
+                columns.append((column_name, referenced_table_name, referenced_column_name))
+        return dict((table_name, key_columns[normalize(table_name)]) for table_name in table_names)
+
     def get_indexes(self, cursor, table_name):
         cursor.execute("SHOW INDEX FROM %s" % self.connection.ops.quote_name(table_name))
         # Do a two-pass search for indexes: on first pass check which indexes
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+A thread-safe, in-process pool for zxJDBC connections. It is used by the
+backends when the database OPTIONS contain a POOL entry and no JNDI data
+source is configured.
+"""
+
+import threading
+import time
+
+from com.ziclix.python.sql import zxJDBC
+
+__all__ = (
+    'ConnectionPool',
+    'close_pools',
+    'get_pool',
+)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, connect, options):
+    """
+    Gets the pool registered for `key`, creating it on first use.
+
+    :param key: Key identifying the database and the credentials and
+                options of its connections
+    :param connect: Callable returning a new zxJDBC connection
+    :param options: Pool options, see `ConnectionPool`
+    :return: ConnectionPool
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                connect,
+                min_size=options.get('MIN', 0),
+                max_size=options.get('MAX', 10),
+                idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                timeout=options.get('TIMEOUT', 30),
+            )
+        return pool
+
+
+def close_pools(match=None):
+    """
+    Closes the pools whose key matches, e.g. before their database is dropped.
+    Their idle connections are closed at once, borrowed connections when they
+    are released. Later `get_pool` calls create new pools.
+
+    :param match: Callable checking a pool key, None closes all pools
+    """
+    with _pools_lock:
+        keys = [key for key in _pools if match is None or match(key)]
+        pools = [_pools.pop(key) for key in keys]
+
+    for pool in pools:
+        pool.close()
+
+
+class ConnectionPool(object):
+    """
+    Keeps up to `max_size` open connections. Connections which have been idle
+    for more than `idle_timeout` seconds are closed, as long as at least
+    `min_size` connections stay open. If all connections are in use,
+    `acquire` waits up to `timeout` seconds for one to be released.
+
+    Once the pool has been closed, released connections are closed as well.
+    """
+    def __init__(self, connect, min_size=0, max_size=10, idle_timeout=300, timeout=30):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._connect = connect
+        self._condition = threading.Condition()
+        self._idle = []  # (connection, released at), most recently used last
+        self._size = 0  # idle and borrowed connections
+        self._closed = False
+
+    @property
+    def size(self):
+        """
+        :return: Number of open connections
+        """
+        return self._size
+
+    @property
+    def idle(self):
+        """
+        :return: Number of idle connections
+        """
+        return len(self._idle)
+
+    def acquire(self, validate=None):
+        """
+        Borrows a connection from the pool, opening a new one if there is no
+        idle connection and the pool isn't exhausted.
+
+        :param validate: Optional callable checking if an idle connection is
+                         still usable; unusable connections are discarded
+        :return: zxJDBC connection
+        """
+        deadline = time.time() + self.timeout if self.timeout is not None else None
+
+        with self._condition:
+            expired = self._pop_expired()
+        for expired_connection in expired:
+            self._close(expired_connection)
+
+        while True:
+            with self._condition:
+                connection = None
+                while True:
+                    if self._idle:
+                        connection = self._idle.pop()[0]
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.time() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise zxJDBC.OperationalError(
+                            "Timed out waiting for a connection, all %d pooled "
+                            "connections are in use" % self.max_size)
+                    self._condition.wait(remaining)
+
+            if connection is None:
+                try:
+                    return self._connect()
+                except:
+                    self._forget()
+                    raise
+
+            if validate is None or validate(connection):
+                return connection
+            self.discard(connection)
+
+    def release(self, connection):
+        """
+        Returns a borrowed connection to the pool. Pending transactions are
+        rolled back; if that fails, the connection is discarded.
+
+        :param connection: zxJDBC connection
+        """
+        try:
+            if not connection.autocommit:
+                connection.rollback()
+                connection.autocommit = True
+        except zxJDBC.Error:
+            self.discard(connection)
+            return
+
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                expired = [connection]
+            else:
+                self._idle.append((connection, time.time()))
+                expired = self._pop_expired()
+            self._condition.notify()
+
+        for expired_connection in expired:
+            self._close(expired_connection)
+
+    def discard(self, connection):
+        """
+        Closes a borrowed connection instead of returning it to the pool.
+
+        :param connection: zxJDBC connection
+        """
+        self._close(connection)
+        self._forget()
+
+    def close(self):
+        """
+        Closes all idle connections, and the borrowed ones once they are
+        released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for connection, _ in idle:
+            self._close(connection)
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _pop_expired(self):
+        """
+        Removes the connections idle for longer than `idle_timeout` from the
+        pool. Must be called with the lock held; the returned connections
+        have to be closed by the caller.
+
+        :return: List of zxJDBC connections
+        """
+        if self.idle_timeout is None:
+            return []
+
+        expired = []
+        limit = time.time() - self.idle_timeout
+        while self._idle and self._size > self.min_size and self._idle[0][1] < limit:
+            expired.append(self._idle.pop(0)[0])
+            self._size -= 1
+        return expired
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except zxJDBC.Error:
+            pass
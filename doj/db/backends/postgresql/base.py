@@ -5,6 +5,10 @@ PostgreSQL database backend for DOJ.
 Requires JDBC driver: org.postgresql.Driver
 """
 
+import weakref
+
+from java.sql import SQLException
+
 from django.conf import settings
 from django.db.utils import InterfaceError
 from django.utils.functional import cached_property
@@ -25,6 +29,10 @@ from doj.db.backends.postgresql.schema import DatabaseSchemaEditor
 DatabaseError = BaseDatabaseWrapper.DatabaseError
 IntegrityError = BaseDatabaseWrapper.IntegrityError
 
+# The time zone each open connection has been set up with, so connections
+# reused from a pool aren't set up again
+_connection_time_zones = weakref.WeakKeyDictionary()
+
 
 def utc_tzinfo_factory(offset):
     if offset != 0:
@@ -62,6 +70,15 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     jdbc_default_host = 'localhost'
     jdbc_default_port = 5432
     jdbc_default_name = 'postgres'
+    doj_options = BaseDatabaseWrapper.doj_options + (
+        'COPY_THRESHOLD',
+    )
+    jdbc_batch_connection_properties = {
+        'reWriteBatchedInserts': 'true',
+    }
+    # PgJDBC ignores the fetch size in autocommit mode and reads the whole
+    # result set at once.
+    streaming_requires_transaction = True
     # This dictionary maps Field objects to their associated PostgreSQL column
     # types, as strings. Column-type strings can contain format strings; they'll
     # be interpolated against the values of Field.__dict__ before being output.
@@ -126,20 +143,44 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.introspection = DatabaseIntrospection(self)
         self.validation = BaseDatabaseValidation(self)
 
+        # If set, bulk_create() loads at least `copy_threshold` objects with
+        # COPY instead of INSERT.
+        self.copy_threshold = self.get_option('COPY_THRESHOLD')
+
+    def get_time_zone_name(self):
+        """
+        :return: Name of the time zone of the connections, or None if the
+                 server default is used
+        """
+        return 'UTC' if settings.USE_TZ else self.settings_dict.get('TIME_ZONE')
+
+    def get_jdbc_connection_properties(self, conn_params):
+        """
+        Passes the time zone as startup option of the connections, so it
+        doesn't have to be set with an extra statement.
+        """
+        properties = super(DatabaseWrapper, self).get_jdbc_connection_properties(conn_params)
+        tz = self.get_time_zone_name()
+        if tz:
+            options = properties.get('options')
+            tz_option = '-c TimeZone=%s' % tz
+            properties['options'] = '%s %s' % (options, tz_option) if options else tz_option
+        return properties
+
     def init_connection_state(self):
-        settings_dict = dict(self.settings_dict)
-        tz = 'UTC' if settings.USE_TZ else settings_dict.get('TIME_ZONE')
+        tz = self.get_time_zone_name()
 
         if tz:
             try:
-                get_parameter_status = self.connection.get_parameter_status
-            except AttributeError:
-                conn_tz = None
-            else:
-                conn_tz = get_parameter_status('TimeZone')
-
-            if conn_tz != tz:
-                cursor = CursorWrapper(self.connection.cursor())
+                if _connection_time_zones.get(self.connection) == tz:
+                    # A pooled connection which has been set up before
+                    return
+            except TypeError:
+                # The connection doesn't support weak references
+                pass
+
+            if self._get_connection_time_zone() != tz:
+                cursor = CursorWrapper(self.connection.cursor(), self)
                 try:
                     cursor.execute(self.ops.set_time_zone_sql() % self.ops.quote_name(tz))
                 finally:
@@ -149,8 +190,27 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                 if not self.get_autocommit():
                     self.connection.commit()
 
+            try:
+                _connection_time_zones[self.connection] = tz
+            except TypeError:
+                pass
+
+    def _get_connection_time_zone(self):
+        """
+        Gets the time zone the server reported for the current connection,
+        without a round trip. Drivers before PgJDBC 42.2 don't provide it.
+
+        :return: Name of the time zone, or None if it is unknown
+        """
+        try:
+            from org.postgresql import PGConnection
+            jdbc_connection = self.connection.__connection__.unwrap(PGConnection)
+            return jdbc_connection.getParameterStatus('TimeZone')
+        except (ImportError, AttributeError, SQLException):
+            return None
+
     def create_cursor(self):
-        return CursorWrapper(self.connection.cursor())
+        return CursorWrapper(self.new_jdbc_cursor(), self)
 
     def check_constraints(self, table_names=None):
         """
@@ -160,14 +220,6 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.cursor().execute('SET CONSTRAINTS ALL IMMEDIATE')
         self.cursor().execute('SET CONSTRAINTS ALL DEFERRED')
 
-    def is_usable(self):
-        try:
-            self.connection.cursor().execute("SELECT 1")
-        except self.Error:
-            return False
-        else:
-            return True
-
     def schema_editor(self, *args, **kwargs):
         """
         Returns a new instance of this backend's SchemaEditor.
@@ -180,5 +232,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
     @cached_property
     def pg_version(self):
+        return self.get_server_capabilities()['version']
+
+    def probe_server_capabilities(self):
         with self.temporary_connection():
-            return get_version(self.connection)
+            return {
+                'version': get_version(self.connection),
+            }
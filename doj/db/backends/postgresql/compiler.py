@@ -20,7 +20,41 @@ class SQLCompiler(compiler.SQLCompiler):
 
 
 class SQLInsertCompiler(compiler.SQLInsertCompiler, SQLCompiler):
-    pass
+
+    def execute_sql(self, return_id=False):
+        if not return_id and self._can_copy():
+            fields = self.query.fields
+            self.connection.ops.copy_from(self.query.get_meta().db_table, self._copy_rows(fields),
+                                          [field.column for field in fields])
+            return
+        return super(SQLInsertCompiler, self).execute_sql(return_id)
+
+    def _can_copy(self):
+        """
+        Checks if the objects can be loaded with COPY, which is done for at
+        least COPY_THRESHOLD objects with values for all columns.
+        """
+        threshold = self.connection.copy_threshold
+        fields = self.query.fields
+        return (
+            threshold is not None and
+            len(self.query.objs) >= threshold and
+            bool(fields) and
+            not any(hasattr(field, 'get_placeholder') or field.get_internal_type() == 'BinaryField'
+                    for field in fields)
+        )
+
+    def _copy_rows(self, fields):
+        """
+        Yields the values of the objects to insert, prepared for the database.
+        """
+        for obj in self.query.objs:
+            yield [
+                field.get_db_prep_save(
+                    getattr(obj, field.attname) if self.query.raw else field.pre_save(obj, True),
+                    connection=self.connection
+                ) for field in fields
+            ]
 
 
 class SQLDeleteCompiler(compiler.SQLDeleteCompiler, SQLCompiler):
@@ -2,13 +2,58 @@
 
 from __future__ import unicode_literals
 
+import datetime
+
+from java.lang import String, System
+from java.sql import SQLException
+
 from django.conf import settings
+from django.utils import six
+from django.utils.encoding import force_text
 
 from doj.db.backends import JDBCBaseDatabaseOperations as BaseDatabaseOperations
+from doj.db.backends import _jdbc_error
+from doj.db.backends import instrumentation
+
+
+def _copy_csv_value(value):
+    """
+    Formats a value for COPY ... WITH CSV. Strings are always quoted, so an
+    empty string isn't read as NULL.
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, bool):
+        return 't' if value else 'f'
+    elif isinstance(value, six.integer_types):
+        return six.text_type(value)
+    elif isinstance(value, float):
+        return repr(value)
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, (bytearray, six.memoryview)):
+        return '\\x' + bytes(value).encode('hex')
+    return '"%s"' % force_text(value).replace('"', '""')
+
+
+def _copy_csv_chunks(rows, chunk_size):
+    """
+    Formats rows for COPY ... WITH CSV, yielding the text of `chunk_size`
+    rows at a time.
+    """
+    lines = []
+    for row in rows:
+        lines.append(','.join(_copy_csv_value(value) for value in row))
+        if len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
 
 
 class DatabaseOperations(BaseDatabaseOperations):
     compiler_module = "doj.db.backends.postgresql.compiler"
+    copy_chunk_size = 1000
 
     def __init__(self, connection):
         super(DatabaseOperations, self).__init__(connection)
@@ -207,3 +252,63 @@ class DatabaseOperations(BaseDatabaseOperations):
     def bulk_insert_sql(self, fields, num_values):
         items_sql = "(%s)" % ", ".join(["%s"] * len(fields))
         return "VALUES " + ", ".join([items_sql] * num_values)
+
+    def copy_from(self, table, rows, columns=None):
+        """
+        Loads rows into a table with COPY ... FROM STDIN, which is a lot
+        faster than inserting them. The rows are sent to the server as CSV in
+        chunks of `copy_chunk_size` rows, so `rows` may also be a generator
+        yielding any number of rows.
+
+        :param table: Model or name of the table
+        :param rows: Iterable of sequences of column values
+        :param columns: Names of the columns the values are for, defaults to
+                        the concrete fields of the model or all columns of the table
+        :return: Number of copied rows
+        """
+        if hasattr(table, '_meta'):
+            if columns is None:
+                columns = [field.column for field in table._meta.concrete_fields]
+            table = table._meta.db_table
+
+        sql = 'COPY %s' % self.quote_name(table)
+        if columns:
+            sql += ' (%s)' % ', '.join(self.quote_name(column) for column in columns)
+        sql += ' FROM STDIN WITH CSV'
+
+        # The driver classes are only available with the driver on the CLASSPATH
+        from org.postgresql import PGConnection
+
+        self.connection.ensure_connection()
+        # The COPY bypasses the cursors, so the transaction of a streamed
+        # query has to be ended here
+        self.connection.end_streaming()
+        start = System.nanoTime()
+        with self.connection.wrap_database_errors:
+            try:
+                jdbc_connection = self.connection.connection.__connection__.unwrap(PGConnection)
+                copy_in = jdbc_connection.getCopyAPI().copyIn(sql)
+            except SQLException, e:
+                raise _jdbc_error(e)
+
+            try:
+                for chunk in _copy_csv_chunks(rows, self.copy_chunk_size):
+                    data = String(chunk).getBytes('UTF-8')
+                    copy_in.writeToCopy(data, 0, len(data))
+                rowcount = copy_in.endCopy()
+            except SQLException, e:
+                raise _jdbc_error(e)
+            finally:
+                if copy_in.isActive():
+                    copy_in.cancelCopy()
+
+        if instrumentation.listeners:
+            instrumentation.notify(instrumentation.StatementEvent(
+                alias=self.connection.alias,
+                sql=sql,
+                many=True,
+                execute_time=(System.nanoTime() - start) / 1e9,
+                fetch_time=0.0,
+                rows=rowcount,
+            ))
+        return rowcount
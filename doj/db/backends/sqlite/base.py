@@ -8,6 +8,7 @@ Requires JDBC driver: org.sqlite.JDBC
 from __future__ import unicode_literals
 
 import datetime
+import functools
 import warnings
 import re
 
@@ -28,6 +29,8 @@ from doj.db.backends import JDBCBaseDatabaseValidation as BaseDatabaseValidation
 from doj.db.backends import JDBCBaseDatabaseOperations as BaseDatabaseOperations
 from doj.db.backends import JDBCCursorWrapper as CursorWrapper
 from doj.db.backends import JDBCConnection
+from doj.db.backends import _is_query
+from doj.db.backends.utils import LRUCache
 
 from doj.db.backends.sqlite.client import DatabaseClient
 from doj.db.backends.sqlite.creation import DatabaseCreation
@@ -51,6 +54,37 @@ def parse_datetime_with_timezone_support(value):
     return dt
 
 
+def convert_date_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    elif isinstance(value, datetime.date):
+        return value
+    elif isinstance(value, six.integer_types):
+        # Dates bound as java.sql.Date are stored as milliseconds since the epoch
+        return datetime.date.fromtimestamp(value / 1000.0)
+    return parse_date(value)
+
+
+def convert_datetime_value(value):
+    if isinstance(value, six.integer_types):
+        # Datetimes bound as java.sql.Timestamp are stored as milliseconds
+        # since the epoch
+        if settings.USE_TZ:
+            return datetime.datetime.utcfromtimestamp(value / 1000.0).replace(tzinfo=timezone.utc)
+        return datetime.datetime.fromtimestamp(value / 1000.0)
+    elif isinstance(value, datetime.datetime):
+        if settings.USE_TZ and timezone.is_naive(value):
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+    return parse_datetime_with_timezone_support(value)
+
+
+def convert_time_value(value):
+    if isinstance(value, datetime.time):
+        return value
+    return parse_time(value)
+
+
 def adapt_datetime_with_timezone_support(value):
     # Equivalent to DateTimeField.get_db_prep_value. Used only by raw SQL.
     if settings.USE_TZ:
@@ -86,31 +120,74 @@ def create_function(conn, name, num_args, py_func):
 
 
 class SQLiteCursorWrapper(CursorWrapper):
+    def __init__(self, cursor, db=None):
+        super(SQLiteCursorWrapper, self).__init__(cursor, db)
+        self._connection_cursor = cursor
+        self._reader = None
+
+    def _prepare(self, sql, fetch_size=None, force=False):
+        if self._reader is not None:
+            # The statement cache belongs to the main connection
+            self._release_statement()
+            return sql
+        return super(SQLiteCursorWrapper, self)._prepare(sql, fetch_size, force)
+
+    def _use_reader(self, use_reader):
+        """
+        Switches between a reader connection and the main connection of the
+        database wrapper for the next query.
+
+        :param use_reader: True if the query should be run on a reader
+        """
+        if use_reader == (self._reader is not None):
+            return
+
+        self._release_statement()
+        if use_reader:
+            self._reader = self.db.acquire_reader()
+            self.cursor = self._reader.cursor(1)
+        else:
+            self._release_reader()
+
+    def _release_reader(self):
+        if self._reader is None:
+            return
+
+        reader, self._reader = self._reader, None
+        try:
+            self.cursor.close()
+        finally:
+            self.cursor = self._connection_cursor
+            self.db.release_reader(reader)
+
     def close(self):
         try:
-            return self.cursor.close()
+            self._release_reader()
+            return super(SQLiteCursorWrapper, self).close()
         except BaseDatabaseWrapper.ProgrammingError:
             pass
 
-    def execute(self, *args, **kwargs):
+    def execute(self, sql, params=None):
+        if self.db is not None:
+            self._use_reader(self.db.reads_from_snapshot(sql))
         try:
-            return super(SQLiteCursorWrapper, self).execute(*args, **kwargs)
+            return super(SQLiteCursorWrapper, self).execute(sql, params)
         except BaseDatabaseWrapper.Error, e:  # Aggregates may raise an error in conjunction with joins, when there is no data to select
             if e.message == "column -1 out of bounds [1,1] [SQLCode: 0]":
                 return None
             raise e
 
+    def executemany(self, sql, param_list):
+        if self.db is not None:
+            # Only queries are run on a reader
+            self._use_reader(False)
+        return super(SQLiteCursorWrapper, self).executemany(sql, param_list)
+
 
 class DatabaseFeatures(BaseDatabaseFeatures):
-    # SQLite cannot handle us only partially reading from a cursor's result set
-    # and then writing the same rows to the database in another cursor. This
-    # setting ensures we always read result sets fully into memory all in one
-    # go.
-    can_use_chunked_reads = False
     test_db_allows_multiple_connections = False
     supports_unspecified_pk = True
     supports_timezones = False
-    supports_1000_query_parameters = False
     supports_mixed_date_datetime_comparisons = False
     has_bulk_insert = True
     can_combine_inserts_with_and_without_auto_increment_pk = False
@@ -125,12 +202,45 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     supports_paramstyle_pyformat = False
     supports_sequence_reset = False
 
+    @cached_property
+    def can_use_chunked_reads(self):
+        # SQLite cannot handle us only partially reading from a cursor's result
+        # set and then writing the same rows to the database in another cursor.
+        # Unless the queries are read from a WAL snapshot on a separate
+        # connection, result sets are always read fully into memory in one go.
+        return self.connection.chunked_reads
+
+    @cached_property
+    def sqlite_version(self):
+        """
+        :return: Version of the SQLite library used by the JDBC driver as tuple
+        """
+        return self.connection.get_server_capabilities()['version']
+
+    @cached_property
+    def max_query_params(self):
+        """
+        The maximum number of variables in a query (SQLITE_LIMIT_VARIABLE_NUMBER).
+        It's read from the compile options of the library, or derived from its
+        version if the default value hasn't been changed.
+        """
+        max_variable_number = self.connection.get_server_capabilities()['max_variable_number']
+        if max_variable_number is not None:
+            return max_variable_number
+        return 32766 if self.sqlite_version >= (3, 32, 0) else 999
+
+    @cached_property
+    def supports_1000_query_parameters(self):
+        return self.max_query_params >= 1000
+
+    @cached_property
+    def can_insert_multiple_rows(self):
+        # Multi-row VALUES clauses were added in SQLite 3.7.11
+        return self.sqlite_version >= (3, 7, 11)
+
     @cached_property
     def uses_savepoints(self):
-        with self.connection.cursor() as cursor:
-            cursor.execute('SELECT SQLITE_VERSION()')
-            version = (int(i) for i in cursor.fetchone()[0].split('.'))
-            return tuple(version) >= (3, 6, 8, 0)
+        return self.sqlite_version >= (3, 6, 8)
 
     @cached_property
     def can_release_savepoints(self):
@@ -138,10 +248,7 @@ class DatabaseFeatures(BaseDatabaseFeatures):
 
     @cached_property
     def can_share_in_memory_db(self):
-        with self.connection.cursor() as cursor:
-            cursor.execute('SELECT SQLITE_VERSION()')
-            version = (int(i) for i in cursor.fetchone()[0].split('.'))
-            return tuple(version) >= (3, 7, 13, 0)
+        return self.sqlite_version >= (3, 7, 13)
 
     @cached_property
     def supports_stddev(self):
@@ -150,18 +257,10 @@ class DatabaseFeatures(BaseDatabaseFeatures):
 
         SQLite supports STDDEV as an extension package; so
         connection.ops.check_aggregate_support() can't unilaterally
-        rule out support for STDDEV. We need to manually check
-        whether the call works.
+        rule out support for STDDEV. The server capabilities probe
+        checks whether the call works.
         """
-        with self.connection.cursor() as cursor:
-            cursor.execute('CREATE TABLE STDDEV_TEST (X INT)')
-            try:
-                cursor.execute('SELECT STDDEV(*) FROM STDDEV_TEST')
-                has_support = True
-            except utils.DatabaseError:
-                has_support = False
-            cursor.execute('DROP TABLE STDDEV_TEST')
-        return has_support
+        return self.connection.get_server_capabilities()['stddev']
 
     @cached_property
     def has_zoneinfo_database(self):
@@ -171,14 +270,21 @@ class DatabaseFeatures(BaseDatabaseFeatures):
 class DatabaseOperations(BaseDatabaseOperations):
     def bulk_batch_size(self, fields, objs):
         """
-        SQLite has a compile-time default (SQLITE_LIMIT_VARIABLE_NUMBER) of
-        999 variables per query.
+        SQLite has a compile-time limit (SQLITE_LIMIT_VARIABLE_NUMBER) of
+        variables per query, which defaults to 999 before SQLite 3.32.0.
 
-        If there is just single field to insert, then we can hit another
-        limit, SQLITE_MAX_COMPOUND_SELECT which defaults to 500.
+        Before SQLite 3.8.8, each row of a multi-row insert is a compound
+        select, so we can hit another limit, SQLITE_MAX_COMPOUND_SELECT which
+        defaults to 500.
         """
-        limit = 999 if len(fields) > 1 else 500
-        return (limit // len(fields)) if len(fields) > 0 else len(objs)
+        if not fields:
+            return len(objs)
+
+        features = self.connection.features
+        limit = features.max_query_params // len(fields)
+        if not features.can_insert_multiple_rows or features.sqlite_version < (3, 8, 8):
+            limit = min(limit, 500)
+        return max(limit, 1)
 
     def check_aggregate_support(self, aggregate):
         bad_fields = (fields.DateField, fields.DateTimeField, fields.TimeField)
@@ -192,6 +298,9 @@ class DatabaseOperations(BaseDatabaseOperations):
                 'since date/time is saved as text.')
 
     def date_extract_sql(self, lookup_type, field_name):
+        sql = _sqlite_extract_sql(lookup_type.lower(), field_name)
+        if sql is not None:
+            return sql
         # sqlite doesn't support extract, so we fake it with the user-defined
         # function django_date_extract that's registered in connect(). Note that
         # single quotes are used because this is a string (and could otherwise
@@ -209,6 +318,9 @@ class DatabaseOperations(BaseDatabaseOperations):
             connector, timedelta.days, timedelta.seconds, timedelta.microseconds)
 
     def date_trunc_sql(self, lookup_type, field_name):
+        sql = _sqlite_trunc_sql(_date_trunc_formats, lookup_type.lower(), field_name)
+        if sql is not None:
+            return sql
         # sqlite doesn't support DATE_TRUNC, so we fake it with a user-defined
         # function django_date_trunc that's registered in connect(). Note that
         # single quotes are used because this is a string (and could otherwise
@@ -216,6 +328,12 @@ class DatabaseOperations(BaseDatabaseOperations):
         return "django_date_trunc('%s', %s)" % (lookup_type.lower(), field_name)
 
     def datetime_extract_sql(self, lookup_type, field_name, tzname):
+        # Datetimes are stored in UTC, so SQLite can compute the lookup itself
+        # unless they have to be converted to another time zone.
+        if tzname is None or tzname == 'UTC':
+            sql = _sqlite_extract_sql(lookup_type.lower(), field_name, localtime=not settings.USE_TZ)
+            if sql is not None:
+                return sql, []
         # Same comment as in date_extract_sql.
         if settings.USE_TZ:
             if pytz is None:
@@ -226,6 +344,12 @@ class DatabaseOperations(BaseDatabaseOperations):
             lookup_type.lower(), field_name), [tzname]
 
     def datetime_trunc_sql(self, lookup_type, field_name, tzname):
+        # Same comment as in datetime_extract_sql.
+        if tzname is None or tzname == 'UTC':
+            sql = _sqlite_trunc_sql(_datetime_trunc_formats, lookup_type.lower(), field_name,
+                                    localtime=not settings.USE_TZ)
+            if sql is not None:
+                return sql, []
         # Same comment as in date_trunc_sql.
         if settings.USE_TZ:
             if pytz is None:
@@ -285,6 +409,38 @@ class DatabaseOperations(BaseDatabaseOperations):
 
         return six.text_type(value)
 
+    # Converters for the field types SQLite returns in another format, by
+    # their internal type. The JDBC driver already returns integers as such.
+    value_converters = {
+        'DateField': convert_date_value,
+        'DateTimeField': convert_datetime_value,
+        'TimeField': convert_time_value,
+    }
+
+    def get_db_converters(self, expression):
+        """
+        Resolves the converters of a selected column once per query, so the
+        compiler only calls them for the columns that need a conversion.
+        """
+        converters = super(DatabaseOperations, self).get_db_converters(expression)
+        internal_type = expression.output_field.get_internal_type()
+        if internal_type == 'DecimalField':
+            converters.append(self.convert_decimalfield_value)
+        elif internal_type in self.value_converters:
+            converters.append(functools.partial(self.convert_field_value, self.value_converters[internal_type]))
+        return converters
+
+    def convert_decimalfield_value(self, value, expression, connection, context):
+        if value is not None:
+            value = backend_utils.typecast_decimal(expression.output_field.format_number(value))
+        return value
+
+    @staticmethod
+    def convert_field_value(convert, value, expression, connection, context):
+        if value is not None:
+            value = convert(value)
+        return value
+
     def convert_values(self, value, field):
         """
         SQLite returns floats when it should be returning decimals,
@@ -299,17 +455,17 @@ class DatabaseOperations(BaseDatabaseOperations):
             return backend_utils.typecast_decimal(field.format_number(value))
         elif internal_type and internal_type.endswith('IntegerField') or internal_type == 'AutoField':
             return int(value)
-        elif internal_type == 'DateField':
-            return parse_date(value)
-        elif internal_type == 'DateTimeField':
-            return parse_datetime_with_timezone_support(value)
-        elif internal_type == 'TimeField':
-            return parse_time(value)
+        elif internal_type in self.value_converters:
+            return self.value_converters[internal_type](value)
 
         # No field, or the field isn't known to be a decimal or integer
         return value
 
     def bulk_insert_sql(self, fields, num_values):
+        if self.connection.features.can_insert_multiple_rows:
+            items_sql = "(%s)" % ", ".join(["%s"] * len(fields))
+            return "VALUES " + ", ".join([items_sql] * num_values)
+
         res = []
         res.append("SELECT %s" % ", ".join(
             "%%s AS %s" % self.quote_name(f.column) for f in fields
@@ -340,6 +496,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
     jdbc_default_host = ''
     jdbc_default_port = 0
     jdbc_default_name = ':memory:'
+    doj_options = BaseDatabaseWrapper.doj_options + (
+        'CHUNKED_READS',
+        'REGEX_CACHE_SIZE',
+    )
     # SQLite doesn't actually support most of these types, but it "does the right
     # thing" given more verbose field definitions, so leave them as is so that
     # schema inspection is more useful.
@@ -415,22 +575,116 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.introspection = DatabaseIntrospection(self)
         self.validation = BaseDatabaseValidation(self)
 
+        # Idle connections for reading query results from a WAL snapshot
+        self._readers = []
+        # Compiled patterns of the REGEXP function, shared by all connections
+        # of this wrapper
+        self.regex_cache = LRUCache(self.get_option('REGEX_CACHE_SIZE', 256))
+
+    @cached_property
+    def chunked_reads(self):
+        """
+        Whether queries executed in autocommit mode are run on separate reader
+        connections, which allows to read their results in chunks while the
+        main connection writes. Requires the CHUNKED_READS option and a file
+        database, which is switched to the WAL journal mode.
+        """
+        name = self.settings_dict['NAME'] or self.jdbc_default_name
+        return bool(self.get_option('CHUNKED_READS')) and not self.is_in_memory_db(name)
+
     def get_new_connection(self, conn_params):
         conn = super(DatabaseWrapper, self).get_new_connection(conn_params)
+        self._create_functions(conn)
+        if self.chunked_reads:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('PRAGMA journal_mode=WAL')
+            finally:
+                cursor.close()
+        return conn
+
+    def _create_functions(self, conn):
+        # The time zone aware functions share a per-connection cache of
+        # parsed and converted datetimes.
+        localtime = _localtime_cache(LRUCache(1024))
         create_function(conn.__connection__, "django_date_extract", 2, _sqlite_date_extract)
         create_function(conn.__connection__, "django_date_trunc", 2, _sqlite_date_trunc)
-        create_function(conn.__connection__, "django_datetime_extract", 3, _sqlite_datetime_extract)
-        create_function(conn.__connection__, "django_datetime_trunc", 3, _sqlite_datetime_trunc)
-        create_function(conn.__connection__, "regexp", 2, _sqlite_regexp)
+        create_function(conn.__connection__, "django_datetime_extract", 3,
+                        functools.partial(_sqlite_datetime_extract, localtime=localtime))
+        create_function(conn.__connection__, "django_datetime_trunc", 3,
+                        functools.partial(_sqlite_datetime_trunc, localtime=localtime))
+        create_function(conn.__connection__, "regexp", 2,
+                        functools.partial(_sqlite_regexp, regex_cache=self.regex_cache))
         create_function(conn.__connection__, "django_format_dtdelta", 5, _sqlite_format_dtdelta)
         create_function(conn.__connection__, "django_power", 2, _sqlite_power)
-        return conn
+
+    def probe_server_capabilities(self):
+        capabilities = {'max_variable_number': None}
+        with self.temporary_connection() as cursor:
+            cursor.execute('SELECT SQLITE_VERSION()')
+            capabilities['version'] = tuple(int(i) for i in cursor.fetchone()[0].split('.'))
+
+            cursor.execute('PRAGMA compile_options')
+            for option, in cursor.fetchall():
+                if option.startswith('MAX_VARIABLE_NUMBER='):
+                    capabilities['max_variable_number'] = int(option.split('=', 1)[1])
+
+            # STDDEV is only available as an extension, check if the call works
+            try:
+                cursor.execute('SELECT STDDEV(X) FROM (SELECT 1 AS X)')
+                capabilities['stddev'] = True
+            except utils.DatabaseError:
+                capabilities['stddev'] = False
+        return capabilities
+
+    def reads_from_snapshot(self, sql):
+        """
+        Checks if `sql` is run on a reader connection. Only queries outside of
+        transactions are, so they see everything written by the main
+        connection.
+
+        :param sql: SQL statement
+        :return: True if a reader connection is used
+        """
+        return self.chunked_reads and _is_query(sql) and self.get_autocommit()
+
+    def acquire_reader(self):
+        """
+        Borrows an idle reader connection, or opens a new one.
+
+        :return: zxJDBC connection
+        """
+        if self._readers:
+            return self._readers.pop()
+
+        reader = self.get_new_jdbc_connection(self.get_connection_params())
+        reader.autocommit = True
+        self._create_functions(reader)
+        return reader
+
+    def release_reader(self, reader):
+        """
+        Returns a reader connection borrowed by a cursor.
+
+        :param reader: zxJDBC connection
+        """
+        if self.connection is None:
+            self._close_reader(reader)
+        else:
+            self._readers.append(reader)
+
+    @staticmethod
+    def _close_reader(reader):
+        try:
+            reader.close()
+        except BaseDatabaseWrapper.Error:
+            pass
 
     def init_connection_state(self):
         pass
 
     def create_cursor(self):
-        return SQLiteCursorWrapper(self.connection.cursor())
+        return SQLiteCursorWrapper(self.new_jdbc_cursor(), self)
 
     def close(self):
         self.validate_thread_sharing()
@@ -440,6 +694,12 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         if self.settings_dict['NAME'] != ":memory:":
             BaseDatabaseWrapper.close(self)
 
+    def _close(self):
+        readers, self._readers = self._readers, []
+        for reader in readers:
+            self._close_reader(reader)
+        return super(DatabaseWrapper, self)._close()
+
     def _savepoint_allowed(self):
         # Two conditions are required here:
         # - A sufficiently recent version of SQLite to support savepoints,
@@ -457,41 +717,7 @@ class DatabaseWrapper(BaseDatabaseWrapper):
             with self.wrap_database_errors:
                 return self.connection.commit()
 
-    def check_constraints(self, table_names=None):
-        """
-        Checks each table name in `table_names` for rows with invalid foreign key references. This method is
-        intended to be used in conjunction with `disable_constraint_checking()` and `enable_constraint_checking()`, to
-        determine if rows with invalid references were entered while constraint checks were off.
-
-        Raises an IntegrityError on the first invalid foreign key reference encountered (if any) and provides
-        detailed information about the invalid reference in the error message.
-
-        Backends can override this method if they can more directly apply constraint checking (e.g. via "SET CONSTRAINTS
-        ALL IMMEDIATE")
-        """
-        cursor = self.cursor()
-        if table_names is None:
-            table_names = self.introspection.table_names(cursor)
-        for table_name in table_names:
-            primary_key_column_name = self.introspection.get_primary_key_column(cursor, table_name)
-            if not primary_key_column_name:
-                continue
-            key_columns = self.introspection.get_key_columns(cursor, table_name)
-            for column_name, referenced_table_name, referenced_column_name in key_columns:
-                cursor.execute("""
-                    SELECT REFERRING.`%s`, REFERRING.`%s` FROM `%s` as REFERRING
-                    LEFT JOIN `%s` as REFERRED
-                    ON (REFERRING.`%s` = REFERRED.`%s`)
-                    WHERE REFERRING.`%s` IS NOT NULL AND REFERRED.`%s` IS NULL"""
-                    % (primary_key_column_name, column_name, table_name, referenced_table_name,
-                    column_name, referenced_column_name, column_name, referenced_column_name))
-                for bad_row in cursor.fetchall():
-                    raise utils.IntegrityError("The row in table '%s' with primary key '%s' has an invalid "
-                        "foreign key: %s.%s contains a value '%s' that does not have a corresponding value in %s.%s."
-                        % (table_name, bad_row[0], table_name, column_name, bad_row[1],
-                        referenced_table_name, referenced_column_name))
-
-    def is_usable(self):
+    def is_connection_usable(self, connection):
         return True
 
     def schema_editor(self, *args, **kwargs):
@@ -515,6 +741,102 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         return name == ":memory:" or "mode=memory" in force_text(name)
 
 
+# strftime formats of the lookups SQLite can compute without calling back
+# into Python. The "%" signs are escaped for the placeholder substitution.
+_extract_formats = {
+    'year': '%%Y',
+    'month': '%%m',
+    'day': '%%d',
+    'week_day': '%%w',
+    'hour': '%%H',
+    'minute': '%%M',
+    'second': '%%S',
+}
+_date_trunc_formats = {
+    'year': '%%Y-01-01',
+    'month': '%%Y-%%m-01',
+    'day': '%%Y-%%m-%%d',
+}
+_datetime_trunc_formats = {
+    'year': '%%Y-01-01 00:00:00',
+    'month': '%%Y-%%m-01 00:00:00',
+    'day': '%%Y-%%m-%%d 00:00:00',
+    'hour': '%%Y-%%m-%%d %%H:00:00',
+    'minute': '%%Y-%%m-%%d %%H:%%M:00',
+    'second': '%%Y-%%m-%%d %%H:%%M:%%S',
+}
+
+
+def _sqlite_strftime_sql(format, field_name, localtime=True):
+    """
+    Formats the date or datetime `field_name` with SQLite's strftime. Values
+    bound as java.sql.Timestamp are stored as milliseconds since the epoch,
+    which are read in local time, or in UTC if `localtime` is False, like
+    `convert_date_value` and `convert_datetime_value` do.
+    """
+    return ("strftime('%(format)s', CASE typeof(%(field)s) "
+            "WHEN 'integer' THEN datetime(%(field)s / 1000, 'unixepoch'%(modifier)s) "
+            "ELSE %(field)s END)" % {'format': format, 'field': field_name,
+                                     'modifier': ", 'localtime'" if localtime else ''})
+
+
+def _sqlite_extract_sql(lookup_type, field_name, localtime=True):
+    """
+    :return: SQL extracting `lookup_type` from `field_name`, or None if the
+             lookup needs the user-defined function
+    """
+    # The field name is repeated, which doesn't work with parameters
+    if lookup_type not in _extract_formats or '%s' in field_name:
+        return None
+
+    sql = "CAST(%s AS INTEGER)" % _sqlite_strftime_sql(_extract_formats[lookup_type], field_name, localtime)
+    if lookup_type == 'week_day':
+        # strftime counts from Sunday = 0, Django from Sunday = 1
+        sql = "(%s + 1)" % sql
+    return sql
+
+
+def _sqlite_trunc_sql(formats, lookup_type, field_name, localtime=True):
+    """
+    :return: SQL truncating `field_name` to `lookup_type`, or None if the
+             lookup needs the user-defined function
+    """
+    if lookup_type not in formats or '%s' in field_name:
+        return None
+    return _sqlite_strftime_sql(formats[lookup_type], field_name, localtime)
+
+
+def _sqlite_parse_datetime(dt):
+    try:
+        if str(dt).isdecimal():
+            return datetime.datetime.fromtimestamp(int(dt)/1000)
+        return backend_utils.typecast_timestamp(dt)
+    except (ValueError, TypeError):
+        return None
+
+
+def _sqlite_localtime(dt, tzname):
+    dt = _sqlite_parse_datetime(dt)
+    if dt is not None and tzname is not None:
+        dt = timezone.localtime(dt, pytz.timezone(tzname))
+    return dt
+
+
+def _localtime_cache(cache):
+    """
+    Memoizes `_sqlite_localtime` in `cache`, as a query usually converts the
+    same values over and over again.
+    """
+    def localtime(dt, tzname):
+        key = (dt, tzname)
+        if key in cache:
+            return cache.get(key)
+        value = _sqlite_localtime(dt, tzname)
+        cache.put(key, value)
+        return value
+    return localtime
+
+
 def _sqlite_date_extract(lookup_type, dt):
     if dt is None:
         return None
@@ -547,34 +869,22 @@ def _sqlite_date_trunc(lookup_type, dt):
         return "%i-%02i-%02i" % (dt.year, dt.month, dt.day)
 
 
-def _sqlite_datetime_extract(lookup_type, dt, tzname):
+def _sqlite_datetime_extract(lookup_type, dt, tzname, localtime=_sqlite_localtime):
     if dt is None:
         return None
-    try:
-        if str(dt).isdecimal():
-            dt = datetime.datetime.fromtimestamp(int(dt)/1000)
-        else:
-            dt = backend_utils.typecast_timestamp(dt)
-    except (ValueError, TypeError):
+    dt = localtime(dt, tzname)
+    if dt is None:
         return None
-    if tzname is not None:
-        dt = timezone.localtime(dt, pytz.timezone(tzname))
     if lookup_type == 'week_day':
         return (dt.isoweekday() % 7) + 1
     else:
         return getattr(dt, lookup_type)
 
 
-def _sqlite_datetime_trunc(lookup_type, dt, tzname):
-    try:
-        if str(dt).isdecimal():
-            dt = datetime.datetime.fromtimestamp(int(dt)/1000)
-        else:
-            dt = backend_utils.typecast_timestamp(dt)
-    except (ValueError, TypeError):
+def _sqlite_datetime_trunc(lookup_type, dt, tzname, localtime=_sqlite_localtime):
+    dt = localtime(dt, tzname)
+    if dt is None:
         return None
-    if tzname is not None:
-        dt = timezone.localtime(dt, pytz.timezone(tzname))
     if lookup_type == 'year':
         return "%i-01-01 00:00:00" % dt.year
     elif lookup_type == 'month':
@@ -607,8 +917,28 @@ def _sqlite_format_dtdelta(dt, conn, days, secs, usecs):
     return str(dt)
 
 
-def _sqlite_regexp(re_pattern, re_string):
-    return bool(re.search(re_pattern, force_text(re_string))) if re_string is not None else False
+def _sqlite_compile_regexp(re_pattern):
+    # The iregex operator prepends "(?i)" to the pattern
+    if re_pattern.startswith('(?i)'):
+        return re.compile(re_pattern[4:], re.IGNORECASE)
+    return re.compile(re_pattern)
+
+
+def _sqlite_regexp(re_pattern, re_string, regex_cache=None):
+    if re_string is None:
+        return False
+
+    if regex_cache is None:
+        pattern = _sqlite_compile_regexp(re_pattern)
+    else:
+        pattern = regex_cache.get(re_pattern)
+        if pattern is None:
+            pattern = _sqlite_compile_regexp(re_pattern)
+            regex_cache.put(re_pattern, pattern)
+
+    if not isinstance(re_string, six.text_type):
+        re_string = force_text(re_string)
+    return bool(pattern.search(re_string))
 
 
 def _sqlite_power(x, y):
@@ -131,11 +131,34 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         Returns a list of (column_name, referenced_table_name, referenced_column_name) for all
         key columns in given table.
         """
-        key_columns = []
-
         # Schema for this table
         cursor.execute("SELECT sql FROM sqlite_master WHERE tbl_name = %s AND type = %s", [table_name, "table"])
-        results = cursor.fetchone()[0].strip()
+        return self._parse_key_columns(cursor.fetchone()[0])
+
+    def get_key_columns_by_table(self, cursor, table_names):
+        """
+        Reads the primary and foreign key columns of all tables with a single
+        query on sqlite_master. Table names are case-insensitive in SQLite.
+        """
+        cursor.execute("SELECT tbl_name, sql FROM sqlite_master WHERE type = %s", ["table"])
+        schemas = dict((name.lower(), sql) for name, sql in cursor.fetchall())
+
+        key_columns = {}
+        for table_name in table_names:
+            sql = schemas.get(table_name.lower())
+            if sql is None:
+                key_columns[table_name] = (None, [])
+            else:
+                key_columns[table_name] = (self._parse_primary_key_column(sql), self._parse_key_columns(sql))
+        return key_columns
+
+    @staticmethod
+    def _parse_key_columns(sql):
+        """
+        Parses the key columns out of the CREATE TABLE statement of a table.
+        """
+        key_columns = []
+        results = sql.strip()
         results = results[results.index('(') + 1:results.rindex(')')]
 
         # Walk through and look for references to other tables. SQLite doesn't
@@ -183,7 +206,15 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         row = cursor.fetchone()
         if row is None:
             raise ValueError("Table %s does not exist" % table_name)
-        results = row[0].strip()
+        return self._parse_primary_key_column(row[0])
+
+    @staticmethod
+    def _parse_primary_key_column(sql):
+        """
+        Parses the primary key column out of the CREATE TABLE statement of a
+        table.
+        """
+        results = sql.strip()
         results = results[results.index('(') + 1:results.rindex(')')]
         for field_desc in results.split(','):
             field_desc = field_desc.strip()
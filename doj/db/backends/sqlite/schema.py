@@ -155,7 +155,44 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         # Special-case implicit M2M tables
         if isinstance(field, ManyToManyField) and field.rel.through._meta.auto_created:
             return self.create_model(field.rel.through)
-        self._remake_table(model, create_fields=[field])
+        if not self._add_column(model, field):
+            self._remake_table(model, create_fields=[field])
+
+    def _add_column(self, model, field):
+        """
+        Adds the column of `field` with ALTER TABLE, which doesn't need to
+        copy the table. This is only done for nullable columns without a
+        default, which are neither primary keys nor unique: other columns
+        would need a DEFAULT clause to fill the existing rows, which would
+        stay on the column, while Django never keeps database defaults.
+
+        :return: False if the table has to be remade instead
+        """
+        db_params = field.db_parameters(connection=self.connection)
+        if db_params['type'] is None:
+            return True
+
+        if (field.primary_key or field.unique or not field.null
+                or self.effective_default(field) is not None):
+            return False
+
+        definition = db_params['type'] + " NULL"
+        if db_params['check']:
+            definition += " CHECK (%s)" % db_params['check']
+        if field.rel and field.db_constraint:
+            definition += " " + self.sql_create_inline_fk % {
+                "to_table": self.quote_name(field.rel.to._meta.db_table),
+                "to_column": self.quote_name(field.rel.get_related_field().column),
+            }
+
+        self.execute(self.sql_create_column % {
+            "table": self.quote_name(model._meta.db_table),
+            "column": self.quote_name(field.column),
+            "definition": definition,
+        })
+        if field.db_index:
+            self.deferred_sql.append(self._create_index_sql(model, [field]))
+        return True
 
     def remove_field(self, model, field):
         """
@@ -174,9 +211,32 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
 
     def _alter_field(self, model, old_field, new_field, old_type, new_type, old_db_params, new_db_params, strict=False):
         """Actually perform a "physical" (non-ManyToMany) field update."""
+        if old_type == new_type and old_db_params == new_db_params and self._is_rename(old_field, new_field):
+            if old_field.column == new_field.column:
+                return
+            # SQLite 3.25 added RENAME COLUMN, which also updates the indexes
+            if self.connection.features.sqlite_version >= (3, 25, 0):
+                self.execute(self.sql_rename_column % {
+                    "table": self.quote_name(model._meta.db_table),
+                    "old_column": self.quote_name(old_field.column),
+                    "new_column": self.quote_name(new_field.column),
+                    "type": new_type,
+                })
+                return
         # Alter by remaking table
         self._remake_table(model, alter_fields=[(old_field, new_field)])
 
+    @staticmethod
+    def _is_rename(old_field, new_field):
+        """
+        Checks if the fields differ in their name and column only.
+        """
+        _, old_path, old_args, old_kwargs = old_field.deconstruct()
+        _, new_path, new_args, new_kwargs = new_field.deconstruct()
+        old_kwargs.pop('db_column', None)
+        new_kwargs.pop('db_column', None)
+        return (old_path, old_args, old_kwargs) == (new_path, new_args, new_kwargs)
+
     def alter_unique_together(self, model, old_unique_together, new_unique_together):
         """
         Deals with a model changing its unique_together.
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A bounded mapping that discards the least recently used entries once it
+    holds more than `maxsize` items. Lookups are counted as hits or misses.
+
+    The cache is not thread-safe; it's meant to be owned by a single
+    database wrapper, which Django never shares between threads.
+    """
+    def __init__(self, maxsize, on_evict=None, on_lookup=None):
+        """
+        :param maxsize: Maximum number of entries, 0 disables the cache
+        :param on_evict: Optional callable invoked with (key, value) for
+                         every entry that gets discarded
+        :param on_lookup: Optional callable invoked with True for every hit
+                          and False for every miss
+        """
+        self.maxsize = max(int(maxsize), 0)
+        self.on_evict = on_evict
+        self.on_lookup = on_lookup
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        Gets the value stored for `key` and marks it as most recently used.
+
+        :param key: Cache key
+        :param default: Value returned on a miss
+        :return: Cached value or `default`
+        """
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self._count(False)
+            return default
+        self._data[key] = value
+        self._count(True)
+        return value
+
+    def put(self, key, value):
+        """
+        Stores `value` for `key`, evicting the least recently used entries
+        if the cache grows beyond its size.
+
+        :param key: Cache key
+        :param value: Value to cache
+        """
+        if self.maxsize == 0:
+            self._evict(key, value)
+            return
+        old_value = self._data.pop(key, None)
+        if old_value is not None and old_value is not value:
+            self._evict(key, old_value)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._evict(*self._data.popitem(last=False))
+
+    def take(self, key, default=None):
+        """
+        Removes `key` from the cache and returns its value, counting the
+        lookup as hit or miss. Used to check out values which must not be
+        handed out twice; they are returned to the cache with `put`.
+
+        :param key: Cache key
+        :param default: Value returned on a miss
+        :return: Cached value or `default`
+        """
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self._count(False)
+            return default
+        self._count(True)
+        return value
+
+    def pop(self, key, default=None):
+        """
+        Removes `key` from the cache without evicting it and without
+        touching the hit/miss counters.
+
+        :param key: Cache key
+        :param default: Value returned if the key isn't cached
+        :return: Cached value or `default`
+        """
+        return self._data.pop(key, default)
+
+    def clear(self):
+        """
+        Evicts all entries.
+        """
+        while self._data:
+            self._evict(*self._data.popitem(last=False))
+
+    def info(self):
+        """
+        :return: Dictionary with the cache statistics
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.on_lookup is not None:
+            self.on_lookup(hit)
+
+    def _evict(self, key, value):
+        if self.on_evict is not None:
+            self.on_evict(key, value)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from optparse import make_option
+
+from django.apps import apps
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.core.management.base import NoArgsCommand, CommandError
+
+from doj.benchmarks import BENCHMARKS, run_benchmarks
+
+
+class Command(NoArgsCommand):
+    option_list = NoArgsCommand.option_list + (
+        make_option('--database', dest='database', default=DEFAULT_DB_ALIAS,
+                    help=u"Nominates the database to benchmark. A test database "
+                         u"is created for it and destroyed afterwards. Defaults "
+                         u"to the \"default\" database."),
+        make_option('--benchmarks', dest='benchmarks', default='',
+                    help=u"Comma separated names of the benchmarks to run. If "
+                         u"unspecified, all benchmarks are run. Available: %s" %
+                         (u", ".join(sorted(BENCHMARKS)), )),
+        make_option('--iterations', dest='iterations', type='int', default=100,
+                    help=u"Number of timed runs of each benchmark."),
+        make_option('--warmup', dest='warmup', type='int', default=10,
+                    help=u"Number of untimed runs before the timed ones."),
+        make_option('--records', dest='records', type='int', default=1000,
+                    help=u"Number of records the workloads operate on."),
+        make_option('--output', dest='output', default='',
+                    help=u"File the JSON results are written to. If unspecified, "
+                         u"they are printed."),
+    )
+    help = u"Runs the DOJ backend benchmarks and reports the results as JSON"
+    requires_system_checks = True
+
+    def handle_noargs(self, **options):
+        if not apps.is_installed('doj.tests.db'):
+            raise CommandError(u"The benchmarks use the models of 'doj.tests.db', "
+                               u"add it to your INSTALLED_APPS.")
+
+        names = [name.strip() for name in options['benchmarks'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(u"Unknown benchmarks: %s" % (u", ".join(unknown), ))
+        if options['iterations'] < 1:
+            raise CommandError(u"--iterations must be at least 1.")
+
+        using = options['database']
+        verbosity = int(options['verbosity'])
+        creation = connections[using].creation
+        old_name = connections[using].settings_dict['NAME']
+
+        creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+        try:
+            report = run_benchmarks(names or None,
+                                    iterations=options['iterations'],
+                                    warmup=options['warmup'],
+                                    records=options['records'],
+                                    using=using)
+        finally:
+            creation.destroy_test_db(old_name, verbosity=verbosity)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
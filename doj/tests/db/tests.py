@@ -1,15 +1,43 @@
 # -*- coding: utf-8 -*-
 
+import gc
+
+from calendar import timegm
 from datetime import datetime
+from unittest import skipUnless
 
-from django.test import TestCase
-from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.apps.registry import Apps
+from django.db import connection, models, transaction
 from django.db.models import Count, Min, Max, Avg, Sum
 from django.db.models.query import EmptyQuerySet
-
+from django.utils.timezone import utc
+
+from com.ziclix.python.sql import zxJDBC
+from java.lang.management import ManagementFactory
+from java.util import TimeZone
+from javax.management import ObjectName
+
+from doj.benchmarks import BENCHMARKS, run_benchmark
+from doj.db.backends import instrumentation
+from doj.db.backends.capabilities import clear_capabilities, get_capabilities
+from doj.db.backends.jmx import DatabaseMBean
+from doj.db.backends.pool import ConnectionPool, close_pools, get_pool
+from doj.db.backends.utils import LRUCache
 from doj.tests.db.models import TestModel, TestModelRelation
 
 
+def database_with_options(**options):
+    """
+    Creates a separate database wrapper for the test database, with
+    additional OPTIONS.
+    """
+    settings_dict = dict(connection.settings_dict)
+    settings_dict['OPTIONS'] = dict(settings_dict.get('OPTIONS') or {}, **options)
+    return connection.__class__(settings_dict, alias=connection.alias)
+
+
 class DBTestCase(TestCase):
     NUMBER_OF_RECORDS = 10
     NUMBER_OF_RELATIONS = 2
@@ -66,6 +94,15 @@ class DBTestCase(TestCase):
 
         self.assertEqual(len(test_models), 2)
 
+    def test_limit_grouped_lookup(self):
+        for i in range(0, DBTestCase.NUMBER_OF_RECORDS):
+            TestModel(field_10=i % 2).save()
+
+        counts = list(TestModel.objects.values('field_10').annotate(Count('id'))[1:2])
+
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(counts[0]['id__count'], DBTestCase.NUMBER_OF_RECORDS / 2)
+
     def test_datetime_lookup(self):
         past_date = datetime(1999, 1, 1)
         future_date = datetime(2999, 2, 2)
@@ -91,6 +128,38 @@ class DBTestCase(TestCase):
         self.assertEqual(TestModel.objects.filter(field_5__gt=past_date).count(), DBTestCase.NUMBER_OF_RECORDS/2)
         self.assertEqual(TestModel.objects.filter(field_5__range=(past_date, future_date)).count(), DBTestCase.NUMBER_OF_RECORDS)
 
+    def test_datetime_extract_trunc(self):
+        past_date = datetime(1999, 1, 1, 13, 14, 15, tzinfo=utc)
+
+        for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
+            test_model = TestModel()
+            test_model.save()
+
+            test_model.field_6 = past_date
+            test_model.save()
+
+        self.assertEqual(TestModel.objects.filter(field_6__week_day=6).count(), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(TestModel.objects.filter(field_6__hour=past_date.hour).count(), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(list(TestModel.objects.datetimes('field_6', 'month')), [datetime(1999, 1, 1, tzinfo=utc)])
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite specific")
+    def test_datetime_lookups_epoch_millis(self):
+        # 1999-01-01 02:00 UTC is still 1998 in New York
+        value = datetime(1999, 1, 1, 2, 0, tzinfo=utc)
+        test_model = TestModel.objects.create()
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE %s SET field_6 = %%s WHERE id = %%s" % TestModel._meta.db_table,
+                           [timegm(value.utctimetuple()) * 1000, test_model.pk])
+
+        default_time_zone = TimeZone.getDefault()
+        TimeZone.setDefault(TimeZone.getTimeZone('America/New_York'))
+        try:
+            self.assertEqual(TestModel.objects.get(pk=test_model.pk).field_6, value)
+            self.assertEqual(TestModel.objects.filter(field_6__month=1, field_6__day=1).count(), 1)
+            self.assertEqual(list(TestModel.objects.datetimes('field_6', 'month')), [datetime(1999, 1, 1, tzinfo=utc)])
+        finally:
+            TimeZone.setDefault(default_time_zone)
+
     def test_join_lookup(self):
         for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
             test_model = TestModel()
@@ -111,6 +180,71 @@ class DBTestCase(TestCase):
 
         self.assertEqual(TestModel.objects.all().count(), DBTestCase.NUMBER_OF_RECORDS)
 
+    def test_bulk_create_batches(self):
+        test_models = [TestModel() for _ in range(0, 1200)]
+        batch_size = connection.ops.bulk_batch_size(['field_4'], test_models)
+        TestModel.objects.bulk_create(test_models, batch_size=batch_size)
+
+        self.assertEqual(TestModel.objects.all().count(), len(test_models))
+
+    @skipUnless(getattr(connection.features, 'can_return_ids_from_bulk_insert', False),
+                "Database doesn't return IDs from bulk inserts")
+    def test_bulk_create_returns_ids(self):
+        test_models = TestModel.objects.bulk_create(
+            [TestModel(field_10=i) for i in range(0, DBTestCase.NUMBER_OF_RECORDS)]
+        )
+
+        ids = [test_model.pk for test_model in test_models]
+        self.assertNotIn(None, ids)
+        self.assertEqual(sorted(ids), list(TestModel.objects.order_by('pk').values_list('pk', flat=True)))
+        for test_model in test_models:
+            self.assertEqual(TestModel.objects.get(pk=test_model.pk).field_10, test_model.field_10)
+
+    @skipUnless(connection.vendor == 'postgresql', "PostgreSQL specific")
+    def test_copy_from(self):
+        rowcount = connection.ops.copy_from(
+            TestModelRelation, ((i,) for i in range(0, DBTestCase.NUMBER_OF_RECORDS)), ['field_1']
+        )
+
+        self.assertEqual(rowcount, DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(TestModelRelation.objects.filter(field_1__lt=DBTestCase.NUMBER_OF_RECORDS).count(),
+                         DBTestCase.NUMBER_OF_RECORDS)
+
+    @skipUnless(connection.vendor == 'postgresql', "PostgreSQL specific")
+    def test_time_zone_startup_option(self):
+        tz = connection.get_time_zone_name()
+        if not tz:
+            self.skipTest("The server default time zone is used")
+
+        properties = connection.get_jdbc_connection_properties({'OPTIONS': {'options': '-c search_path=public'}})
+        self.assertEqual(properties['options'], '-c search_path=public -c TimeZone=%s' % tz)
+
+        db = database_with_options()
+        if connection._get_connection_time_zone() is not None:
+            # The driver reports the time zone, so no statement is needed
+            db.ops.set_time_zone_sql = lambda: self.fail("The time zone has been set with a statement")
+        try:
+            with db.cursor() as cursor:
+                cursor.execute("SHOW TIME ZONE")
+                self.assertEqual(cursor.fetchone()[0], tz)
+        finally:
+            db.close()
+
+    @skipUnless(connection.vendor == 'postgresql', "PostgreSQL specific")
+    def test_copy_from_instrumentation(self):
+        events = []
+        instrumentation.add_listener(events.append)
+        try:
+            connection.ops.copy_from(TestModelRelation, ((i,) for i in range(0, DBTestCase.NUMBER_OF_RECORDS)),
+                                     ['field_1'])
+        finally:
+            instrumentation.remove_listener(events.append)
+
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].sql.startswith('COPY '))
+        self.assertEqual(events[0].alias, connection.alias)
+        self.assertEqual(events[0].rows, DBTestCase.NUMBER_OF_RECORDS)
+
     def test_bulk_update(self):
         for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
             test_model = TestModel()
@@ -207,3 +341,460 @@ class DBTestCase(TestCase):
 
         self.assertEqual(TestModel.objects.none().count(), 0)
         self.assertIsInstance(TestModel.objects.none(), EmptyQuerySet)
+
+    def test_sql_cache(self):
+        test_model = TestModel()
+        test_model.save()
+
+        TestModel.objects.get(id=test_model.id)
+        hits = connection.sql_cache.hits
+
+        for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
+            TestModel.objects.get(id=test_model.id)
+
+        self.assertGreaterEqual(connection.sql_cache.hits - hits, DBTestCase.NUMBER_OF_RECORDS)
+
+    def test_statement_cache(self):
+        test_model = TestModel()
+        test_model.save()
+
+        evicted = []
+
+        def evict(sql, statement):
+            evicted.append(statement)
+            statement.close()
+
+        statement_cache, connection.statement_cache = connection.statement_cache, LRUCache(1, on_evict=evict)
+        try:
+            for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
+                TestModel.objects.get(id=test_model.id)
+
+            self.assertEqual(connection.statement_cache.hits, DBTestCase.NUMBER_OF_RECORDS - 1)
+            self.assertEqual(evicted, [])
+
+            TestModel.objects.get(field_4=test_model.field_4)
+
+            self.assertEqual(len(evicted), 1)
+            self.assertTrue(evicted[0].closed)
+            self.assertEqual(len(connection.statement_cache), 1)
+        finally:
+            connection.statement_cache.clear()
+            connection.statement_cache = statement_cache
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite specific")
+    def test_regex_cache(self):
+        for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
+            TestModel().save()
+
+        hits = connection.regex_cache.hits
+
+        self.assertEqual(TestModel.objects.filter(field_4__regex='^ab').count(), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(TestModel.objects.filter(field_4__iregex='^AB').count(), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(TestModel.objects.filter(field_4__regex='^AB').count(), 0)
+        self.assertGreater(connection.regex_cache.hits, hits)
+
+    @skipUnless(connection.vendor == 'microsoft', "MSSQL specific")
+    def test_introspect_special_types(self):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE [doj introspection] (guid uniqueidentifier, doc xml, version rowversion)")
+            try:
+                description = connection.introspection.get_table_description(cursor, 'doj introspection')
+                constraints = connection.introspection.get_constraints(cursor, 'doj introspection')
+            finally:
+                cursor.execute("DROP TABLE [doj introspection]")
+
+        field_types = [connection.introspection.get_field_type(d.type_code, d) for d in description]
+        self.assertEqual(field_types, ['CharField', 'TextField', 'BinaryField'])
+        self.assertEqual(description[0].internal_size, 36)
+        self.assertEqual(constraints, {})
+
+    def test_key_columns_by_mixed_case_table_name(self):
+        if connection.vendor != 'sqlite' and not connection.get_server_capabilities().get('lower_case_table_names'):
+            self.skipTest("Table names are case-sensitive")
+
+        table_name = ''.join(c.upper() if i % 2 else c for i, c in enumerate(TestModel._meta.db_table))
+        with connection.cursor() as cursor:
+            key_columns = connection.introspection.get_key_columns_by_table(cursor, [table_name])
+
+        primary_key_column, columns = key_columns[table_name]
+        self.assertEqual(primary_key_column, TestModel._meta.pk.column)
+        self.assertIn(TestModel._meta.get_field('field_19').column, [column[0] for column in columns])
+
+    def test_is_usable(self):
+        connection.ensure_connection()
+        self.assertTrue(connection.is_usable())
+
+    def test_instrumentation(self):
+        for _ in range(0, DBTestCase.NUMBER_OF_RECORDS):
+            TestModel().save()
+
+        events = []
+        statistics = instrumentation.StatementStatistics()
+        instrumentation.add_listener(events.append)
+        instrumentation.add_listener(statistics)
+        try:
+            list(TestModel.objects.all())
+        finally:
+            instrumentation.remove_listener(events.append)
+            instrumentation.remove_listener(statistics)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].alias, connection.alias)
+        self.assertEqual(events[0].rows, DBTestCase.NUMBER_OF_RECORDS)
+        self.assertIn(events[0].sql, statistics.snapshot())
+        self.assertEqual(statistics.snapshot()[events[0].sql]['count'], 1)
+
+    def test_benchmarks(self):
+        # A smoke run of a single workload, so the test suite stays fast
+        result = run_benchmark(BENCHMARKS['insert'](records=1), iterations=1)
+
+        self.assertEqual(result['name'], 'insert')
+        self.assertEqual(result['iterations'], 1)
+        self.assertLessEqual(result['latency_ms']['min'], result['latency_ms']['max'])
+        self.assertEqual(TestModel.objects.count(), 0)
+        self.assertRaises(ValueError, run_benchmark, BENCHMARKS['insert'](records=1), iterations=0)
+
+
+class StreamingTestCase(TransactionTestCase):
+    """
+    Streams queries in autocommit mode, in a transaction like PostgreSQL
+    requires it, on every backend.
+    """
+    def setUp(self):
+        connection.streaming_requires_transaction = True
+        TestModel.objects.bulk_create([TestModel() for _ in range(0, DBTestCase.NUMBER_OF_RECORDS)])
+        self.query = "SELECT id FROM %s ORDER BY id" % connection.ops.quote_name(TestModel._meta.db_table)
+
+    def tearDown(self):
+        del connection.streaming_requires_transaction
+
+    def test_abandoned_cursor(self):
+        with connection.streaming(fetch_size=2):
+            cursor = connection.cursor()
+            cursor.execute(self.query)
+            first_row = cursor.fetchone()
+
+        self.assertTrue(connection.get_autocommit())
+        self.assertEqual(len([first_row] + list(cursor.fetchall())), DBTestCase.NUMBER_OF_RECORDS)
+        cursor.close()
+
+    def test_write_after_iterate(self):
+        with connection.streaming(fetch_size=2):
+            cursor = connection.cursor()
+            cursor.execute(self.query)
+            cursor.fetchone()
+
+        with connection.cursor() as other_cursor:
+            other_cursor.execute("UPDATE %s SET field_4 = %%s" % connection.ops.quote_name(TestModel._meta.db_table),
+                                 ['xyz'])
+        connection.close()
+
+        self.assertEqual(TestModel.objects.filter(field_4='xyz').count(), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(len(list(cursor)), DBTestCase.NUMBER_OF_RECORDS - 1)
+
+
+class FetchSizeTestCase(TransactionTestCase):
+    def setUp(self):
+        TestModel.objects.bulk_create([TestModel() for _ in range(0, DBTestCase.NUMBER_OF_RECORDS)])
+
+    def test_streaming(self):
+        with connection.cursor() as cursor:
+            self.assertIsNone(cursor.cursor.fetch_size)
+
+        with connection.streaming(fetch_size=3):
+            with connection.cursor() as cursor:
+                self.assertEqual(cursor.cursor.fetch_size, 3)
+            self.assertEqual(len(list(TestModel.objects.iterator())), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertIsNone(connection.fetch_size)
+
+    def test_fetch_size_option(self):
+        db = database_with_options(FETCH_SIZE=3)
+        try:
+            with db.cursor() as cursor:
+                self.assertEqual(cursor.cursor.fetch_size, 3)
+                cursor.execute("SELECT id FROM %s" % db.ops.quote_name(TestModel._meta.db_table))
+                self.assertEqual(len(cursor.fetchmany(5)), 5)
+                self.assertEqual(len(cursor.fetchall()), DBTestCase.NUMBER_OF_RECORDS - 5)
+        finally:
+            db.close()
+
+
+class BatchTestCase(TransactionTestCase):
+    def setUp(self):
+        self.db = database_with_options(BATCH_SIZE=3, STATEMENT_CACHE_SIZE=10)
+        self.insert = "INSERT INTO %s (%s) VALUES (%%s)" % (
+            self.db.ops.quote_name(TestModelRelation._meta.db_table), self.db.ops.quote_name('field_1'))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_executemany(self):
+        with self.db.cursor() as cursor:
+            cursor.executemany(self.insert, [(i,) for i in range(0, DBTestCase.NUMBER_OF_RECORDS)])
+            # -1 if the driver doesn't report the counts of rewritten batches
+            self.assertIn(cursor.rowcount, (DBTestCase.NUMBER_OF_RECORDS, -1))
+
+            cursor.executemany("UPDATE %s SET %s = %%s WHERE %s < %%s" % (
+                self.db.ops.quote_name(TestModelRelation._meta.db_table),
+                self.db.ops.quote_name('field_1'), self.db.ops.quote_name('field_1'),
+            ), [(100, 2), (200, 4)])
+            self.assertIn(cursor.rowcount, (4, -1))
+
+        self.assertEqual(TestModelRelation.objects.count(), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(TestModelRelation.objects.filter(field_1=100).count(), 2)
+        self.assertEqual(TestModelRelation.objects.filter(field_1=200).count(), 2)
+
+    def test_failed_batch(self):
+        with self.db.cursor() as cursor:
+            self.assertRaises(Exception, cursor.executemany, self.insert, [(1,), (object(),)])
+            cursor.executemany(self.insert, [(2,)])
+
+        self.assertEqual(list(TestModelRelation.objects.values_list('field_1', flat=True)), [2])
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite specific")
+class ChunkedReadsTestCase(TransactionTestCase):
+    def setUp(self):
+        TestModel.objects.bulk_create([TestModel() for _ in range(0, DBTestCase.NUMBER_OF_RECORDS)])
+        self.db = database_with_options(CHUNKED_READS=True)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_can_use_chunked_reads(self):
+        self.assertFalse(connection.features.can_use_chunked_reads)
+        self.assertTrue(self.db.features.can_use_chunked_reads)
+
+        settings_dict = dict(self.db.settings_dict, NAME=':memory:')
+        self.assertFalse(connection.__class__(settings_dict).features.can_use_chunked_reads)
+
+    def test_write_while_reading(self):
+        table = self.db.ops.quote_name(TestModel._meta.db_table)
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT id FROM %s" % table)
+            rows = cursor.fetchmany(2)
+
+            with self.db.cursor() as other_cursor:
+                other_cursor.execute("DELETE FROM %s" % table)
+
+            rows.extend(cursor.fetchall())
+
+        self.assertEqual(len(rows), DBTestCase.NUMBER_OF_RECORDS)
+        self.assertEqual(len(self.db._readers), 1)
+        self.assertEqual(TestModel.objects.count(), 0)
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite specific")
+class SchemaTestCase(TransactionTestCase):
+    def setUp(self):
+        class Author(models.Model):
+            name = models.CharField(max_length=50)
+
+            class Meta:
+                app_label = 'db'
+                apps = Apps()
+                db_table = 'doj_schema_author'
+
+        self.model = Author
+        with connection.schema_editor() as editor:
+            editor.create_model(Author)
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO doj_schema_author (name) VALUES (%s)", ['abc'])
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(self.model)
+
+    def assertRemade(self, queries, remade):
+        self.assertEqual(any('__new' in query['sql'] for query in queries), remade)
+
+    def select(self, column):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT %s FROM doj_schema_author" % column)
+            return cursor.fetchall()
+
+    def test_add_column(self):
+        field = models.IntegerField(null=True)
+        field.set_attributes_from_name('age')
+
+        with CaptureQueriesContext(connection) as queries:
+            with connection.schema_editor() as editor:
+                editor.add_field(self.model, field)
+
+        self.assertRemade(queries, False)
+        self.assertEqual(self.select('age'), [(None,)])
+
+    def test_add_column_with_default(self):
+        field = models.IntegerField(null=True, default=3)
+        field.set_attributes_from_name('age')
+
+        with CaptureQueriesContext(connection) as queries:
+            with connection.schema_editor() as editor:
+                editor.add_field(self.model, field)
+
+        self.assertRemade(queries, True)
+        self.assertEqual(self.select('age'), [(3,)])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'doj_schema_author'")
+            self.assertNotIn('DEFAULT', cursor.fetchone()[0].upper())
+
+    def test_add_unique_column(self):
+        field = models.IntegerField(null=True, unique=True)
+        field.set_attributes_from_name('number')
+
+        with CaptureQueriesContext(connection) as queries:
+            with connection.schema_editor() as editor:
+                editor.add_field(self.model, field)
+
+        self.assertRemade(queries, True)
+        self.assertEqual(self.select('number'), [(None,)])
+
+    def test_rename_column(self):
+        old_field = self.model._meta.get_field('name')
+        new_field = models.CharField(max_length=50, db_column='full_name')
+        new_field.set_attributes_from_name('name')
+
+        with CaptureQueriesContext(connection) as queries:
+            with connection.schema_editor() as editor:
+                editor.alter_field(self.model, old_field, new_field)
+
+        self.assertRemade(queries, connection.features.sqlite_version < (3, 25, 0))
+        self.assertEqual(self.select('full_name'), [('abc',)])
+
+
+class CapabilitiesTestCase(TestCase):
+    def test_probed_once(self):
+        probes = []
+
+        def probe():
+            probes.append(None)
+            return {'version': (1, len(probes))}
+
+        key = 'jdbc:test:capabilities'
+        try:
+            self.assertEqual(get_capabilities(key, probe), {'version': (1, 1)})
+            self.assertEqual(get_capabilities(key, probe), {'version': (1, 1)})
+            self.assertEqual(len(probes), 1)
+
+            clear_capabilities(key)
+
+            self.assertEqual(get_capabilities(key, probe), {'version': (1, 2)})
+        finally:
+            clear_capabilities(key)
+
+    def test_shared_by_wrappers(self):
+        capabilities = connection.get_server_capabilities()
+        db = database_with_options()
+        db.probe_server_capabilities = lambda: self.fail("The server has been probed again")
+
+        self.assertIn('version', capabilities)
+        self.assertIs(db.get_server_capabilities(), capabilities)
+
+
+class JMXTestCase(TestCase):
+    def test_database_mbean(self):
+        db = database_with_options(JMX=True)
+        server = ManagementFactory.getPlatformMBeanServer()
+        name = ObjectName('doj.db:type=Database,alias=%s' % connection.alias)
+        try:
+            self.assertTrue(server.isRegistered(name))
+
+            statements = server.getAttribute(name, 'Statements')
+            with db.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                self.assertEqual(cursor.fetchall(), [(1,)])
+
+            self.assertGreaterEqual(server.getAttribute(name, 'Statements'), statements + 1)
+            self.assertGreaterEqual(server.getAttribute(name, 'ConnectionsOpened'), 1)
+            self.assertGreaterEqual(server.getAttribute(name, 'OpenConnections'), 1)
+            self.assertGreaterEqual(server.getAttribute(name, 'Rows'), 1)
+
+            sql_cache_hits = server.getAttribute(name, 'SqlCacheHits')
+            with db.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            self.assertGreater(server.getAttribute(name, 'SqlCacheHits'), sql_cache_hits)
+        finally:
+            db.close()
+
+        # The counters of a collected wrapper are kept
+        sql_cache_hits = server.getAttribute(name, 'SqlCacheHits')
+        del db
+        gc.collect()
+        self.assertGreaterEqual(server.getAttribute(name, 'SqlCacheHits'), sql_cache_hits)
+
+        attribute_names = [attribute.getName() for attribute in server.getMBeanInfo(name).getAttributes()]
+        self.assertEqual(attribute_names, [attribute[0] for attribute in DatabaseMBean.attributes])
+
+
+class FakeConnection(object):
+    """
+    Stands in for a zxJDBC connection in the connection pool tests.
+    """
+    def __init__(self):
+        self.autocommit = True
+        self.closed = False
+        self.broken = False
+
+    def rollback(self):
+        if self.broken:
+            raise zxJDBC.DatabaseError("Connection is broken")
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def test_acquire_release(self):
+        pool = ConnectionPool(FakeConnection, max_size=2)
+
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(pool.idle, 0)
+
+    def test_discard_on_error(self):
+        pool = ConnectionPool(FakeConnection, max_size=2)
+
+        connection = pool.acquire()
+        connection.autocommit = False
+        connection.broken = True
+        pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.size, 0)
+
+        connection = pool.acquire()
+        pool.release(connection)
+        other_connection = pool.acquire(validate=lambda c: False)
+
+        self.assertTrue(connection.closed)
+        self.assertIsNot(other_connection, connection)
+        self.assertEqual(pool.size, 1)
+
+    def test_max_size(self):
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0)
+
+        connection = pool.acquire()
+
+        self.assertRaises(zxJDBC.OperationalError, pool.acquire)
+        pool.release(connection)
+        self.assertIs(pool.acquire(), connection)
+
+    def test_close_pools(self):
+        key = ('jdbc:test', 'user', 'password', ())
+        pool = get_pool(key, FakeConnection, {})
+        idle_connection = pool.acquire()
+        borrowed_connection = pool.acquire()
+        pool.release(idle_connection)
+
+        close_pools(lambda pool_key: pool_key == key)
+
+        self.assertTrue(idle_connection.closed)
+        self.assertFalse(borrowed_connection.closed)
+        pool.release(borrowed_connection)
+        self.assertTrue(borrowed_connection.closed)
+        self.assertEqual(pool.size, 0)
+        self.assertIsNot(get_pool(key, FakeConnection, {}), pool)
+        close_pools(lambda pool_key: pool_key == key)
@@ -13,6 +13,7 @@ setup(
     ],
     packages=[
         'doj',
+        'doj.benchmarks',
         'doj.db',
         'doj.db.backends',
         'doj.db.backends.mssql',